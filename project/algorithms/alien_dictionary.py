@@ -1,4 +1,8 @@
-from collections import defaultdict, deque
+import os
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .tracing import lazy_trace
 
 class AlienDictionary:
     """
@@ -8,75 +12,128 @@ class AlienDictionary:
     determines the character order used in that language.
     """
     
-    def find_order(self, words):
+    def find_order(self, words, trace=True):
         """
         Find the order of characters in alien language
         
         Args:
             words: List of words sorted in alien language order
+            trace: Include the analysis steps as an explanation (LAZY
+                for a LazyTrace)
             
         Returns:
             dict: Result containing order, validity, and explanation
         """
-        if not words:
+        return self.find_order_stream(words, trace)
+    
+    def find_order_stream(self, words, trace=False):
+        """
+        Find the order of characters from a stream of sorted words
+        
+        Words are consumed one at a time and only compared with their
+        predecessor, so the input can be a generator or an open file and
+        memory stays bounded by the alphabet rather than the word count.
+        Characters get dense integer ids in order of first appearance and
+        the constraint graph is kept in arrays indexed by those ids, which
+        also makes the resulting order deterministic.
+        
+        Args:
+            words: Iterable of words sorted in alien language order
+            trace: Record the word pair behind every distinct edge and
+                explain them (off by default for large corpora, where the
+                explanation is None; LAZY defers formatting until first read)
+            
+        Returns:
+            dict: Result containing order, validity, and explanation
+        """
+        words = iter(words)
+        previous = next(words, None)
+        if previous is None:
             return {
                 'order': '',
                 'valid': True,
                 'explanation': 'Empty word list - no order to determine'
             }
         
-        # Build adjacency graph from word comparisons
-        graph = defaultdict(set)
-        in_degree = defaultdict(int)
-        all_chars = set()
-        
-        # Collect all characters
-        for word in words:
-            for char in word:
-                all_chars.add(char)
-                if char not in in_degree:
-                    in_degree[char] = 0
+        graph = _CharGraph()
+        graph.add_chars(previous)
+        explanation_steps = [] if trace else None
+        violation = _scan_words(graph, previous, words, explanation_steps)
+        if violation:
+            return {
+                'order': '',
+                'valid': False,
+                'explanation': violation
+            }
+        return self._order_result(graph, explanation_steps, trace)
+    
+    def find_order_parallel(self, words, workers=None, chunk_size=None, trace=False):
+        """
+        Find the order of characters, extracting constraints in worker processes
         
-        # Build graph by comparing adjacent words
-        explanation_steps = []
+        The word list is split into chunks that overlap by one word, so every
+        adjacent pair falls in exactly one chunk. Workers return each chunk's
+        characters and distinct edges in order of first appearance plus its
+        first prefix violation. The parent merges them chunk by chunk and
+        runs a single topological sort, so order, validity and explanation
+        are identical to find_order_stream.
         
-        for i in range(len(words) - 1):
-            word1, word2 = words[i], words[i + 1]
-            min_len = min(len(word1), len(word2))
+        Args:
+            words: List of words sorted in alien language order
+            workers: Number of worker processes (defaults to the CPU count)
+            chunk_size: Word pairs per chunk (defaults to an even split over workers)
+            trace: Include the analysis steps as an explanation (LAZY
+                for a LazyTrace)
             
-            # Find first differing character
-            for j in range(min_len):
-                if word1[j] != word2[j]:
-                    char1, char2 = word1[j], word2[j]
-                    if char2 not in graph[char1]:
-                        graph[char1].add(char2)
-                        in_degree[char2] += 1
-                        explanation_steps.append(f"'{word1}' vs '{word2}': {char1} comes before {char2}")
-                    break
-            else:
-                # If word1 is longer than word2 and word2 is prefix of word1
-                if len(word1) > len(word2):
+        Returns:
+            dict: Result containing order, validity, and explanation
+        """
+        pairs = len(words) - 1
+        workers = workers or os.cpu_count() or 1
+        chunk_size = chunk_size or -(-pairs // workers)
+        if pairs <= 0 or chunk_size >= pairs:
+            return self.find_order_stream(words, trace)
+        
+        chunks = [words[start:start + chunk_size + 1] for start in range(0, pairs, chunk_size)]
+        graph = _CharGraph()
+        explanation_steps = [] if trace else None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chars, edges, steps, violation in pool.map(_extract_edges, chunks, [trace] * len(chunks)):
+                if violation:
                     return {
                         'order': '',
                         'valid': False,
-                        'explanation': f"Invalid order: '{word2}' cannot come after '{word1}' if it's a prefix"
+                        'explanation': violation
                     }
+                graph.add_chars(chars)
+                for i, (char1, char2) in enumerate(edges):
+                    if graph.add_edge(char1, char2) and trace:
+                        explanation_steps.append(steps[i])
         
-        # Topological sort using Kahn's algorithm
-        queue = deque([char for char in all_chars if in_degree[char] == 0])
-        result = []
+        return self._order_result(graph, explanation_steps, trace)
+    
+    def find_order_file(self, path, trace=False, encoding='utf-8'):
+        """
+        Find the order of characters from a file with one sorted word per line
         
-        while queue:
-            char = queue.popleft()
-            result.append(char)
+        Args:
+            path: Path of the word list
+            trace: Include the analysis steps as an explanation (LAZY
+                for a LazyTrace)
+            encoding: Text encoding of the file
             
-            for neighbor in graph[char]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
+        Returns:
+            dict: Result containing order, validity, and explanation
+        """
+        with open(path, encoding=encoding) as f:
+            return self.find_order_stream((line.rstrip('\r\n') for line in f), trace)
+    
+    def _order_result(self, graph, explanation_steps, trace):
+        """Topologically sort a finished constraint graph into a result dict"""
+        order = graph.topological_order()
         
         # Check if there's a cycle (invalid ordering)
-        if len(result) != len(all_chars):
+        if order is None:
             return {
                 'order': '',
                 'valid': False,
@@ -84,7 +141,292 @@ class AlienDictionary:
             }
         
         return {
-            'order': ''.join(result),
+            'order': order,
+            'valid': True,
+            'explanation': lazy_trace(trace, _format_steps, explanation_steps)
+        }
+
+
+class _CharGraph:
+    """
+    Character constraint graph over dense integer ids
+    
+    Ids are assigned in order of first appearance. Successor lists are
+    arrays indexed by id, in-degrees a single array, and every distinct
+    edge is remembered once (as source_id << 32 | target_id) so repeated
+    constraints are ignored.
+    """
+    
+    def __init__(self):
+        self.ids = {}
+        self.chars = []
+        self.known = set()
+        self.successors = []
+        self.in_degree = array('i')
+        self.edges = set()
+        self.edge_order = array('q')
+    
+    def add_chars(self, word):
+        """Give ids to the characters of word not seen before"""
+        if self.known.issuperset(word):
+            return
+        for char in word:
+            if char not in self.ids:
+                self.ids[char] = len(self.chars)
+                self.chars.append(char)
+                self.known.add(char)
+                self.successors.append(array('i'))
+                self.in_degree.append(0)
+    
+    def add_edge(self, char1, char2):
+        """
+        Record that char1 comes before char2
+        
+        Returns:
+            bool: True if the constraint is new
+        """
+        a, b = self.ids[char1], self.ids[char2]
+        key = a << 32 | b
+        if key in self.edges:
+            return False
+        self.edges.add(key)
+        self.edge_order.append(key)
+        self.successors[a].append(b)
+        self.in_degree[b] += 1
+        return True
+    
+    def topological_order(self):
+        """Kahn's algorithm in id order; None if the constraints have a cycle"""
+        in_degree = array('i', self.in_degree)
+        queue = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+        result = []
+        
+        while queue:
+            node = queue.popleft()
+            result.append(self.chars[node])
+            
+            for neighbor in self.successors[node]:
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    queue.append(neighbor)
+        
+        if len(result) != len(self.chars):
+            return None
+        return ''.join(result)
+
+
+def _format_edge(previous, word, char1, char2):
+    """Explanation of the constraint found between two adjacent words"""
+    return f"'{previous}' vs '{word}': {char1} comes before {char2}"
+
+
+def _format_steps(steps):
+    """Explanation text for (previous, word, char1, char2) edge steps"""
+    return f"Analysis steps: {'; '.join(_format_edge(*step) for step in steps)}"
+
+
+def _format_append(previous, word, edge):
+    """Explanation of an appended word, edge being its new constraint or None"""
+    if edge is None:
+        return 'No new constraint'
+    return _format_edge(previous, word, *edge)
+
+
+def _scan_words(graph, previous, words, explanation_steps=None):
+    """
+    Add the constraints of adjacent word pairs to graph
+    
+    Args:
+        graph: _CharGraph already holding the characters of previous
+        previous: Word preceding the first word of words
+        words: Iterator over the remaining words
+        explanation_steps: List collecting the (previous, word, char1, char2)
+            behind every new edge, or None
+        
+    Returns:
+        str: Explanation of the first prefix violation, or None
+    """
+    for word in words:
+        graph.add_chars(word)
+        
+        # Find first differing character
+        for char1, char2 in zip(previous, word):
+            if char1 != char2:
+                if graph.add_edge(char1, char2) and explanation_steps is not None:
+                    explanation_steps.append((previous, word, char1, char2))
+                break
+        else:
+            # If previous is longer than word and word is prefix of previous
+            if len(previous) > len(word):
+                return f"Invalid order: '{word}' cannot come after '{previous}' if it's a prefix"
+        previous = word
+    return None
+
+
+class IncrementalAlienOrder:
+    """
+    Alien character order maintained as sorted words are appended
+    
+    Keeps the constraint graph of the lexicon seen so far together with a
+    topological order of its characters. Each new constraint is inserted
+    with the Pearce-Kelly online algorithm: when the edge contradicts the
+    current order, only the characters between its endpoints in that order
+    are searched and reordered, and a path back from the target means the
+    word closes a cycle. A word that would close a cycle or breaks the
+    prefix rule is rejected immediately and the lexicon is left unchanged.
+    """
+    
+    def __init__(self, words=(), trace=True):
+        """
+        Args:
+            words: Initial words sorted in alien language order
+            trace: Explain each appended word's constraint (True or LAZY)
+        """
+        self.trace = trace
+        self.graph = _CharGraph()
+        self.predecessors = []
+        self.position = array('i')  # character id -> index in the order
+        self.nodes = array('i')     # index in the order -> character id
+        self.last_word = None
+        self.word_count = 0
+        
+        for word in words:
+            result = self.append(word)
+            if not result['valid']:
+                raise ValueError(result['explanation'])
+    
+    @property
+    def order(self):
+        """Current character order"""
+        return ''.join(self.graph.chars[node] for node in self.nodes)
+    
+    def append(self, word):
+        """
+        Append the next word of the lexicon
+        
+        Args:
+            word: Word sorting at or after the last accepted word
+            
+        Returns:
+            dict: Result containing order, validity, and explanation; an
+            invalid word is not appended
+        """
+        previous = self.last_word
+        edge = None
+        if previous is not None:
+            for char1, char2 in zip(previous, word):
+                if char1 != char2:
+                    edge = (char1, char2)
+                    break
+            else:
+                if len(previous) > len(word):
+                    return {
+                        'order': '',
+                        'valid': False,
+                        'explanation': f"Invalid order: '{word}' cannot come after '{previous}' if it's a prefix"
+                    }
+        
+        # A cycle needs both characters to be known already, so check it
+        # before the word's characters are added
+        added = False
+        known = edge is not None and self.graph.known.issuperset(edge)
+        if known:
+            added = self._insert_edge(*edge)
+            if added is None:
+                return {
+                    'order': '',
+                    'valid': False,
+                    'explanation': f"Cycle detected: '{word}' cannot come after '{previous}'"
+                }
+        self._add_chars(word)
+        if edge is not None and not known:
+            added = self._insert_edge(*edge)
+        
+        self.last_word = word
+        self.word_count += 1
+        return {
+            'order': self.order,
             'valid': True,
-            'explanation': f"Analysis steps: {'; '.join(explanation_steps)}"
-        }
\ No newline at end of file
+            'explanation': lazy_trace(self.trace, _format_append, previous, word, edge if added else None)
+        }
+    
+    def _add_chars(self, word):
+        """Register new characters at the end of the order"""
+        first_new = len(self.graph.chars)
+        self.graph.add_chars(word)
+        for node in range(first_new, len(self.graph.chars)):
+            self.predecessors.append(array('i'))
+            self.position.append(len(self.nodes))
+            self.nodes.append(node)
+    
+    def _insert_edge(self, char1, char2):
+        """
+        Add the constraint char1 -> char2, repairing the order (Pearce-Kelly)
+        
+        Returns:
+            bool: True if the edge is new, False if already known, None if
+            it would close a cycle (the graph is then left untouched)
+        """
+        graph, position = self.graph, self.position
+        source, target = graph.ids[char1], graph.ids[char2]
+        if source << 32 | target in graph.edges:
+            return False
+        
+        lower, upper = position[target], position[source]
+        if lower < upper:
+            # Characters reachable from target that currently sit before source
+            forward, seen, stack = [], {target}, [target]
+            while stack:
+                node = stack.pop()
+                forward.append(node)
+                for successor in graph.successors[node]:
+                    if successor == source:
+                        return None
+                    if position[successor] < upper and successor not in seen:
+                        seen.add(successor)
+                        stack.append(successor)
+            
+            # Characters reaching source that currently sit after target
+            backward, seen, stack = [], {source}, [source]
+            while stack:
+                node = stack.pop()
+                backward.append(node)
+                for predecessor in self.predecessors[node]:
+                    if position[predecessor] > lower and predecessor not in seen:
+                        seen.add(predecessor)
+                        stack.append(predecessor)
+            
+            # Reuse the same slots: backward set first, then forward set,
+            # each keeping its relative order
+            forward.sort(key=position.__getitem__)
+            backward.sort(key=position.__getitem__)
+            affected = backward + forward
+            slots = sorted(position[node] for node in affected)
+            for node, slot in zip(affected, slots):
+                position[node] = slot
+                self.nodes[slot] = node
+        
+        graph.add_edge(char1, char2)
+        self.predecessors[target].append(source)
+        return True
+
+
+def _extract_edges(words, trace):
+    """
+    Extract the constraints of one chunk of words inside a worker process
+    
+    Returns:
+        tuple: Characters in order of first appearance, distinct edges as
+        (char1, char2) in order of first appearance, their explanation
+        steps (only when trace is on) and the first prefix violation or None
+    """
+    words = iter(words)
+    first = next(words)
+    graph = _CharGraph()
+    graph.add_chars(first)
+    explanation_steps = [] if trace else None
+    violation = _scan_words(graph, first, words, explanation_steps)
+    
+    chars = graph.chars
+    edges = [(chars[key >> 32], chars[key & 0xFFFFFFFF]) for key in graph.edge_order]
+    return ''.join(chars), edges, explanation_steps, violation
@@ -1,3 +1,10 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, it only vectorizes array input
+    np = None
+
+from .tracing import lazy_trace
+
 class BitwiseMatching:
     """
     Bitwise Matching Pattern
@@ -6,12 +13,14 @@ class BitwiseMatching:
     with the same number of binary 1s as n.
     """
     
-    def next_larger_same_bits(self, n):
+    def next_larger_same_bits(self, n, trace=True):
         """
         Find next larger integer with same number of 1s
         
         Args:
             n: Input integer
+            trace: Include the step-by-step explanation (LAZY to format
+                it on first read)
             
         Returns:
             dict: Result with binary representations and explanation
@@ -21,7 +30,7 @@ class BitwiseMatching:
                 'result': -1,
                 'input_binary': bin(n),
                 'result_binary': 'N/A',
-                'explanation': 'No solution for non-positive integers'
+                'explanation': 'No solution for non-positive integers' if trace else None
             }
         
         original_n = n
@@ -47,7 +56,7 @@ class BitwiseMatching:
                 'result': -1,
                 'input_binary': bin(original_n),
                 'result_binary': 'N/A',
-                'explanation': 'No larger number exists with same number of 1s'
+                'explanation': 'No larger number exists with same number of 1s' if trace else None
             }
         
         # Position of rightmost non-trailing zero
@@ -62,24 +71,213 @@ class BitwiseMatching:
         # Insert (c1-1) ones on the right
         n |= (1 << (c1 - 1)) - 1
         
-        explanation_steps = [
-            f"Original number: {original_n} ({bin(original_n)})",
-            f"Trailing zeros: {c0}, Ones after trailing zeros: {c1}",
-            f"Rightmost non-trailing zero position: {pos}",
-            f"Result: {n} ({bin(n)})"
-        ]
-        
         return {
             'result': n,
             'input_binary': bin(original_n),
             'result_binary': bin(n),
-            'explanation': ' | '.join(explanation_steps)
+            'explanation': lazy_trace(trace, _explain_next_larger, original_n, c0, c1, pos, n)
         }
     
+    def next_larger_same_bits_many(self, values, trace=False, bit_width=31):
+        """
+        Next larger integer with the same number of 1s for many inputs
+        
+        Uses Gosper's hack, which needs no bit loop: with c the lowest set
+        bit of n and r = n + c, the answer is r | ((r ^ n) >> 2) // c.
+        Lists are processed in a plain loop over Python ints; NumPy arrays
+        are processed in a handful of whole-array operations.
+        
+        Args:
+            values: List of integers or NumPy integer array (e.g. uint64)
+            trace: Also return one explanation string per value; with
+                LAZY they are built from values and results when first read
+            bit_width: Results must fit in this many bits (31 matches
+                next_larger_same_bits); None removes the limit for lists,
+                arrays allow at most 63
+            
+        Returns:
+            dict: 'results' (list, or int64 array for array input) with -1
+            where no larger number exists, and 'explanations' when traced
+        """
+        if np is not None and isinstance(values, np.ndarray):
+            results = self._next_larger_array(values, bit_width)
+        else:
+            limit = None if bit_width is None else 1 << bit_width
+            results = []
+            append = results.append
+            for n in values:
+                if n <= 0 or (limit is not None and n >= limit):
+                    append(-1)
+                    continue
+                c = n & -n
+                r = n + c
+                n = (((r ^ n) >> 2) // c) | r
+                append(-1 if limit is not None and n >= limit else n)
+        
+        output = {'results': results}
+        if trace:
+            output['explanations'] = lazy_trace(trace, _explain_many, values, results)
+        return output
+    
+    def iter_same_popcount(self, start, limit=None):
+        """
+        Yield start and every larger integer with the same number of 1s
+        
+        Steps with Gosper's hack on plain ints, so there is no width limit
+        and nothing is allocated per step beyond the int itself.
+        
+        Args:
+            start: First value (non-positive values yield nothing)
+            limit: Stop before reaching this value (None runs forever)
+            
+        Yields:
+            int: Values in increasing order
+        """
+        n = start
+        if n <= 0:
+            return
+        while limit is None or n < limit:
+            yield n
+            c = n & -n
+            r = n + c
+            n = (((r ^ n) >> 2) // c) | r
+    
+    def combinations_bitmasks(self, n, k):
+        """
+        Yield every k-subset of n items as a bitmask, in increasing order
+        
+        Args:
+            n: Number of items
+            k: Subset size
+            
+        Yields:
+            int: Bitmasks with exactly k of the low n bits set
+        """
+        if k < 0 or k > n:
+            return
+        if k == 0:
+            yield 0
+            return
+        yield from self.iter_same_popcount((1 << k) - 1, 1 << n)
+    
+    def combinations_bitmasks_array(self, n, k, chunk_size=65536, out=None):
+        """
+        Yield the bitmasks of combinations_bitmasks in NumPy chunks
+        
+        Subsets are produced in the same increasing order by splitting on
+        the top item: the subsets without it, then the (k-1)-subsets of the
+        rest with its bit set. Small (n, k) blocks are built once with
+        whole-array operations and reused under every prefix of high bits.
+        
+        Args:
+            n: Number of items (at most 64)
+            k: Subset size
+            chunk_size: Length of the buffer when out is not given
+            out: Preallocated uint64 array that every chunk is written into
+            
+        Yields:
+            numpy.ndarray: View of the first filled entries of out, which is
+            overwritten by the next chunk
+        """
+        if np is None:
+            raise ImportError('combinations_bitmasks_array requires NumPy')
+        if n > 64:
+            raise ValueError('combinations_bitmasks_array supports at most 64 items')
+        if out is None:
+            out = np.empty(chunk_size, dtype=np.uint64)
+        if k < 0 or k > n:
+            return
+        
+        tables = {}
+        filled = 0
+        for block in self._combination_blocks(n, k, 0, len(out), tables):
+            while len(block):
+                count = min(len(block), len(out) - filled)
+                out[filled:filled + count] = block[:count]
+                block = block[count:]
+                filled += count
+                if filled == len(out):
+                    yield out
+                    filled = 0
+        if filled:
+            yield out[:filled]
+    
+    def _combination_blocks(self, n, k, high, block_size, tables):
+        """Arrays of k-subsets of n items, OR-ed with high, in increasing order"""
+        if k == 0 or k == n or self._combination_count(n, k) <= block_size:
+            table = self._combination_table(n, k, tables)
+            yield table | np.uint64(high) if high else table
+            return
+        yield from self._combination_blocks(n - 1, k, high, block_size, tables)
+        yield from self._combination_blocks(n - 1, k - 1, high | 1 << (n - 1), block_size, tables)
+    
+    def _combination_table(self, n, k, tables):
+        """All k-subsets of n items as a sorted uint64 array, memoized in tables"""
+        table = tables.get((n, k))
+        if table is None:
+            if k == 0:
+                table = np.zeros(1, dtype=np.uint64)
+            elif k == n:
+                table = np.array([(1 << n) - 1], dtype=np.uint64)
+            else:
+                table = np.concatenate((
+                    self._combination_table(n - 1, k, tables),
+                    self._combination_table(n - 1, k - 1, tables) | np.uint64(1 << (n - 1))
+                ))
+            tables[(n, k)] = table
+        return table
+    
+    def _combination_count(self, n, k):
+        """Binomial coefficient C(n, k)"""
+        count = 1
+        for i in range(min(k, n - k)):
+            count = count * (n - i) // (i + 1)
+        return count
+    
+    def _next_larger_array(self, values, bit_width):
+        """Vectorized Gosper's hack over an integer array"""
+        bit_width = 63 if bit_width is None else bit_width
+        if not 0 < bit_width <= 63:
+            raise ValueError('bit_width must be between 1 and 63 for arrays')
+        if values.dtype.kind not in 'iu':
+            raise ValueError('values must be an integer array')
+        
+        limit = np.uint64(1 << bit_width)
+        valid = values > 0
+        n = np.where(valid, values, 0).astype(np.uint64)
+        valid &= n < limit
+        
+        c = n & (~n + np.uint64(1))
+        c[c == 0] = 1
+        r = n + c
+        nxt = (((r ^ n) >> np.uint64(2)) // c) | r
+        valid &= nxt < limit
+        return np.where(valid, nxt.astype(np.int64), -1)
+    
     def count_set_bits(self, n):
         """Helper method to count number of 1s in binary representation"""
         count = 0
         while n:
             count += n & 1
             n >>= 1
-        return count
\ No newline at end of file
+        return count
+
+
+def _explain_next_larger(original_n, c0, c1, pos, n):
+    """Step-by-step explanation for next_larger_same_bits"""
+    explanation_steps = [
+        f"Original number: {original_n} ({bin(original_n)})",
+        f"Trailing zeros: {c0}, Ones after trailing zeros: {c1}",
+        f"Rightmost non-trailing zero position: {pos}",
+        f"Result: {n} ({bin(n)})"
+    ]
+    return ' | '.join(explanation_steps)
+
+
+def _explain_many(values, results):
+    """One explanation string per value for next_larger_same_bits_many"""
+    return [
+        f"{n} ({bin(n)}) -> {result} ({bin(result)})" if result != -1
+        else f"{n} ({bin(n)}) -> no larger number with the same number of 1s"
+        for n, result in zip(map(int, values), map(int, results))
+    ]
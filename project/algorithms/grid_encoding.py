@@ -0,0 +1,160 @@
+import base64
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, it only speeds up bit unpacking
+    np = None
+
+# Expansion of every byte into its 8 bits, most significant first
+_BYTE_BITS = [bytes((value >> (7 - i)) & 1 for i in range(8)) for value in range(256)]
+
+# Maps cell bytes 0 and 1 to the digits b'0' and b'1'
+_BIT_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+class PackedGrid:
+    """
+    Compact 0/1 Grid
+    
+    Stores a grid as a flat row-major bytearray with one byte per cell.
+    The solvers consume the bytearray directly, and row indexing returns
+    bytes so grid[r][c] keeps working wherever a nested list was expected.
+    """
+    
+    def __init__(self, rows, cols, cells):
+        """
+        Args:
+            rows, cols: Grid dimensions
+            cells: Flat row-major bytearray of 0s and 1s
+        """
+        if len(cells) != rows * cols:
+            raise ValueError(f'Expected {rows * cols} cells, got {len(cells)}')
+        self.rows = rows
+        self.cols = cols
+        self.cells = cells
+    
+    def __len__(self):
+        return self.rows
+    
+    def __getitem__(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError('PackedGrid row out of range')
+        return bytes(self.cells[row * self.cols:(row + 1) * self.cols])
+    
+    @classmethod
+    def from_bitpacked(cls, rows, cols, data):
+        """
+        Decode base64 bit-packed rows
+        
+        Each row is packed most significant bit first and padded to a whole
+        number of bytes, the layout produced by numpy.packbits(axis=1).
+        
+        Args:
+            rows, cols: Grid dimensions
+            data: Base64 string of rows * ceil(cols / 8) bytes
+        """
+        raw = base64.b64decode(data)
+        row_bytes = (cols + 7) // 8
+        if len(raw) != rows * row_bytes:
+            raise ValueError(f'Expected {rows * row_bytes} packed bytes, got {len(raw)}')
+        
+        if np is not None:
+            bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8).reshape(rows, row_bytes), axis=1)
+            return cls(rows, cols, bytearray(bits[:, :cols].tobytes()))
+        
+        cells = bytearray()
+        for r in range(rows):
+            chunk = raw[r * row_bytes:(r + 1) * row_bytes]
+            cells += b''.join(map(_BYTE_BITS.__getitem__, chunk))[:cols]
+        return cls(rows, cols, cells)
+    
+    @classmethod
+    def from_rle(cls, runs):
+        """
+        Decode run-length-encoded rows
+        
+        Args:
+            runs: One list per row of run lengths alternating between 0s and
+                1s, starting with 0s (use a leading 0 for rows starting with 1)
+        """
+        rows = len(runs)
+        cols = sum(runs[0]) if runs else 0
+        cells = bytearray()
+        for r, row in enumerate(runs):
+            if sum(row) != cols:
+                raise ValueError(f'Row {r} has {sum(row)} cells, expected {cols}')
+            for i, length in enumerate(row):
+                cells += (b'\x01' if i % 2 else b'\x00') * length
+        return cls(rows, cols, cells)
+    
+    @classmethod
+    def from_payload(cls, payload):
+        """
+        Decode a request payload of the form
+        {'encoding': 'bitpacked', 'rows': R, 'cols': C, 'data': base64} or
+        {'encoding': 'rle', 'runs': [[...], ...]}
+        """
+        encoding = payload.get('encoding')
+        if encoding == 'bitpacked':
+            return cls.from_bitpacked(payload['rows'], payload['cols'], payload['data'])
+        if encoding == 'rle':
+            return cls.from_rle(payload['runs'])
+        raise ValueError(f'Unknown grid encoding: {encoding}')
+    
+    def to_bitpacked(self):
+        """Encode as base64 bit-packed rows (see from_bitpacked)"""
+        row_bytes = (self.cols + 7) // 8
+        packed = bytearray()
+        for r in range(self.rows):
+            row = bytes(self.cells[r * self.cols:(r + 1) * self.cols])
+            row += bytes(row_bytes * 8 - self.cols)
+            packed += int(row.translate(_BIT_DIGITS), 2).to_bytes(row_bytes, 'big')
+        return base64.b64encode(bytes(packed)).decode('ascii')
+    
+    def to_rle(self):
+        """Encode as run-length-encoded rows (see from_rle)"""
+        return [
+            compress_row(self.cells[r * self.cols:(r + 1) * self.cols], alternating=True)
+            for r in range(self.rows)
+        ]
+
+
+def compress_row(row, alternating=False):
+    """
+    Run-length encode one row
+    
+    Args:
+        row: String or bytes-like row
+        alternating: For 0/1 rows, return bare run lengths alternating
+            between 0s and 1s starting with 0s instead of [count, value] pairs
+    
+    Returns:
+        list: Runs of the row
+    """
+    runs = []
+    previous, count = None, 0
+    for value in row:
+        if value == previous:
+            count += 1
+            continue
+        if count:
+            runs.append([count, previous])
+        previous, count = value, 1
+    if count:
+        runs.append([count, previous])
+    
+    if not alternating:
+        return runs
+    lengths = [0] if runs and runs[0][1] else []
+    return lengths + [count for count, _ in runs]
+
+
+def decode_grid(value):
+    """Turn a grid request field into a PackedGrid if it is an encoded payload"""
+    if isinstance(value, dict):
+        return PackedGrid.from_payload(value)
+    return value
+
+
+def compress_visualization(visualization):
+    """Run-length encode visualization rows into [count, char] pairs"""
+    return [compress_row(row) for row in visualization]
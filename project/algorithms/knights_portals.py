@@ -1,5 +1,13 @@
-from collections import deque
-import heapq
+from array import array
+from collections import OrderedDict, deque
+
+from .grid_encoding import PackedGrid
+from .tracing import lazy_trace
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only the vectorized engine needs it
+    np = None
 
 class KnightsPortals:
     """
@@ -9,19 +17,38 @@ class KnightsPortals:
     You can teleport between any two empty cells exactly once.
     """
     
-    def __init__(self):
+    # Grids with at least this many cells use the NumPy engine when available
+    NUMPY_MIN_CELLS = 40000
+    
+    def __init__(self, engine='auto'):
+        """
+        Args:
+            engine: 'python', 'numpy', 'bidirectional', or 'auto' to pick
+                NumPy for large grids
+        """
+        if engine not in ('auto', 'python', 'numpy', 'bidirectional'):
+            raise ValueError(f'Unknown engine: {engine}')
+        if engine == 'numpy' and np is None:
+            raise ValueError('The numpy engine requires NumPy to be installed')
+        self.engine = engine
+        
+        # Number of nodes expanded by the searches of the last shortest_path call
+        self.nodes_expanded = 0
+        
         # Knight moves: 8 possible L-shaped moves
         self.knight_moves = [
             (-2, -1), (-2, 1), (-1, -2), (-1, 2),
             (1, -2), (1, 2), (2, -1), (2, 1)
         ]
     
-    def shortest_path(self, grid):
+    def shortest_path(self, grid, trace=True):
         """
         Find shortest path with optional teleportation
         
         Args:
             grid: 2D matrix where 0 = empty, 1 = obstacle
+            trace: Include the path visualization (True, or LAZY to draw
+                it when read)
             
         Returns:
             dict: Path information including distance and visualization
@@ -31,7 +58,8 @@ class KnightsPortals:
                 'path': [],
                 'distance': -1,
                 'used_teleport': False,
-                'visualization': []
+                'visualization': [] if trace else None,
+                'nodes_expanded': 0
             }
         
         rows, cols = len(grid), len(grid[0])
@@ -44,15 +72,19 @@ class KnightsPortals:
                 'path': [],
                 'distance': -1,
                 'used_teleport': False,
-                'visualization': []
+                'visualization': [] if trace else None,
+                'nodes_expanded': 0
             }
         
-        # Try path without teleportation first
-        no_teleport_result = self._find_path_no_teleport(grid, start, end)
+        self.nodes_expanded = 0
         
-        # Try path with teleportation
+        # Try path with teleportation first
         teleport_result = self._find_path_with_teleport(grid, start, end)
         
+        # A plain knight path only wins if it is no longer than the teleport one
+        max_distance = teleport_result['distance'] if teleport_result['distance'] != -1 else None
+        no_teleport_result = self._find_path_no_teleport(grid, start, end, max_distance)
+        
         # Return the better result
         if no_teleport_result['distance'] == -1:
             best_result = teleport_result
@@ -62,96 +94,398 @@ class KnightsPortals:
             best_result = no_teleport_result if no_teleport_result['distance'] <= teleport_result['distance'] else teleport_result
         
         # Add visualization
-        best_result['visualization'] = self._create_visualization(grid, best_result['path'])
+        best_result['visualization'] = lazy_trace(trace, self._create_visualization, grid, best_result['path'])
+        best_result['nodes_expanded'] = self.nodes_expanded
         
         return best_result
     
-    def _find_path_no_teleport(self, grid, start, end):
-        """Find shortest path using only knight moves"""
-        rows, cols = len(grid), len(grid[0])
-        visited = set()
-        queue = deque([(start[0], start[1], 0, [start])])
+    def prepare(self, grid, sources=None):
+        """
+        Prepare a grid for many start/end queries
         
-        while queue:
-            row, col, dist, path = queue.popleft()
-            
-            if (row, col) == end:
-                return {
-                    'path': path,
-                    'distance': dist,
-                    'used_teleport': False
-                }
-            
-            if (row, col) in visited:
-                continue
+        Args:
+            grid: 2D matrix where 0 = empty, 1 = obstacle
+            sources: Optional list of (row, col) cells to search from up front
             
-            visited.add((row, col))
+        Returns:
+            PreparedKnightsGrid: Object answering query(start, end)
             
-            # Try all knight moves
-            for dr, dc in self.knight_moves:
-                new_row, new_col = row + dr, col + dc
-                
-                if (0 <= new_row < rows and 0 <= new_col < cols and 
-                    grid[new_row][new_col] == 0 and (new_row, new_col) not in visited):
-                    queue.append((new_row, new_col, dist + 1, path + [(new_row, new_col)]))
+        Raises:
+            ValueError: If a source is outside the grid or an obstacle
+        """
+        prepared = PreparedKnightsGrid(self, grid)
+        for source in sources or []:
+            source = tuple(source)
+            if (len(source) != 2 or not all(type(v) is int for v in source) or
+                    not prepared._is_empty(source)):
+                raise ValueError(f'Source {list(source)} is not an empty cell of the grid')
+            prepared.distance_field(source)
+        return prepared
+    
+    def _find_path_no_teleport(self, grid, start, end, max_distance=None):
+        """
+        Find shortest path using only knight moves
         
-        return {'path': [], 'distance': -1, 'used_teleport': False}
+        Args:
+            max_distance: Optional bound; longer paths are not searched for
+        """
+        rows, cols, cells = self._flatten_grid(grid)
+        if self.engine == 'bidirectional':
+            path = self._bidirectional_search(rows, cols, cells, start, end, max_distance)
+            if path is None:
+                return {'path': [], 'distance': -1, 'used_teleport': False}
+            return {'path': path, 'distance': len(path) - 1, 'used_teleport': False}
+        if self._use_numpy(rows, cols):
+            return self._numpy_path(rows, cols, cells, start, end, False, max_distance)
+        dist, parent, goal = self._search(rows, cols, cells, start, end, False, max_distance)
+        return self._path_result(parent, goal, rows, cols)
     
     def _find_path_with_teleport(self, grid, start, end):
-        """Find shortest path with one teleportation allowed"""
+        """
+        Find shortest path with one teleportation allowed
+        
+        Teleportation is modelled as a single virtual portal node: a cell that
+        has not teleported yet enters the portal for free, and leaving the
+        portal costs one move onto any empty cell. The portal is expanded at
+        most once, so the search is a 0-1 BFS over two layers (before and
+        after teleporting) rather than a fan-out to every cell from every state.
+        """
+        rows, cols, cells = self._flatten_grid(grid)
+        if self.engine == 'bidirectional':
+            return self._bidirectional_teleport_path(rows, cols, cells, start, end)
+        if self._use_numpy(rows, cols):
+            return self._numpy_path(rows, cols, cells, start, end, True)
+        dist, parent, goal = self._search(rows, cols, cells, start, end, True)
+        return self._path_result(parent, goal, rows, cols)
+    
+    def _flatten_grid(self, grid):
+        """
+        Flatten grid into a row-major bytearray (0 = empty, 1 = obstacle)
+        
+        A PackedGrid is already flat and is used as is, without copying.
+        """
+        if isinstance(grid, PackedGrid):
+            return grid.rows, grid.cols, grid.cells
+        
         rows, cols = len(grid), len(grid[0])
+        cells = bytearray(rows * cols)
+        for r, row in enumerate(grid):
+            if len(row) != cols:
+                raise ValueError('All grid rows must have the same length')
+            cells[r * cols:(r + 1) * cols] = bytes(map(bool, row))
+        return rows, cols, cells
+    
+    def _search(self, rows, cols, cells, start, end, allow_teleport, max_distance=None):
+        """
+        0-1 BFS over a flat node space with parent pointers
         
-        # State: (row, col, used_teleport, distance, path)
-        # Use priority queue for Dijkstra-like approach
-        pq = [(0, start[0], start[1], False, [start])]
-        visited = set()
+        Node r * cols + c is cell (r, c) before teleporting, node
+        n + r * cols + c is the same cell after teleporting and node 2 * n
+        is the virtual portal. Only distances and predecessors are stored,
+        so memory is proportional to the grid, not to the frontier paths.
         
-        while pq:
-            dist, row, col, used_teleport, path = heapq.heappop(pq)
+        Args:
+            rows, cols: Grid dimensions
+            cells: Flat row-major bytearray (0 = empty)
+            start: (row, col) source cell
+            end: (row, col) target cell, or None to explore everything
+            allow_teleport: Whether the portal layer is searched
+            max_distance: Optional bound on the distances explored
             
-            if (row, col) == end:
-                return {
-                    'path': path,
-                    'distance': dist,
-                    'used_teleport': used_teleport
-                }
+        Returns:
+            tuple: (dist, parent, goal) where goal is the node at which
+            the target was reached, or -1
+        """
+        n = rows * cols
+        portal = 2 * n
+        size = 2 * n + 1 if allow_teleport else n
+        dist = array('i', [-1]) * size
+        parent = array('i', [-1]) * size
+        
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1] if end is not None else -1
+        dist[source] = 0
+        if source == target:
+            return dist, parent, source
+        
+        moves = self.knight_moves
+        queue = deque([source])
+        
+        while queue:
+            node = queue.popleft()
+            d = dist[node] + 1
+            if max_distance is not None and d > max_distance:
+                break
+            self.nodes_expanded += 1
             
-            state = (row, col, used_teleport)
-            if state in visited:
+            if node == portal:
+                # Leave the portal onto every empty cell except the one we entered from
+                origin = parent[portal]
+                for cell in range(n):
+                    if cells[cell] == 0 and cell != origin and dist[n + cell] == -1:
+                        dist[n + cell] = d
+                        parent[n + cell] = portal
+                        if cell == target:
+                            return dist, parent, n + cell
+                        queue.append(n + cell)
                 continue
             
-            visited.add(state)
+            layer = n if node >= n else 0
+            row, col = divmod(node - layer, cols)
             
             # Regular knight moves
-            for dr, dc in self.knight_moves:
+            for dr, dc in moves:
                 new_row, new_col = row + dr, col + dc
-                
-                if (0 <= new_row < rows and 0 <= new_col < cols and 
-                    grid[new_row][new_col] == 0):
-                    new_state = (new_row, new_col, used_teleport)
-                    if new_state not in visited:
-                        heapq.heappush(pq, (dist + 1, new_row, new_col, used_teleport, 
-                                          path + [(new_row, new_col)]))
-            
-            # Teleportation (if not used yet)
-            if not used_teleport:
-                for tr in range(rows):
-                    for tc in range(cols):
-                        if grid[tr][tc] == 0 and (tr, tc) != (row, col):
-                            new_state = (tr, tc, True)
-                            if new_state not in visited:
-                                heapq.heappush(pq, (dist + 1, tr, tc, True, 
-                                              path + [(tr, tc)]))
-        
-        return {'path': [], 'distance': -1, 'used_teleport': False}
+                if 0 <= new_row < rows and 0 <= new_col < cols:
+                    cell = new_row * cols + new_col
+                    if cells[cell] == 0 and dist[layer + cell] == -1:
+                        dist[layer + cell] = d
+                        parent[layer + cell] = node
+                        if cell == target:
+                            return dist, parent, layer + cell
+                        queue.append(layer + cell)
+            
+            # Enter the portal at zero cost (only the first pre-teleport node can)
+            if allow_teleport and layer == 0 and dist[portal] == -1:
+                dist[portal] = d - 1
+                parent[portal] = node
+                queue.appendleft(portal)
+        
+        return dist, parent, -1
+    
+    def _reconstruct_path(self, parent, node, rows, cols):
+        """Walk parent pointers back from node, skipping the portal"""
+        n = rows * cols
+        path = []
+        while node != -1:
+            if node != 2 * n:
+                path.append(divmod(node % n, cols))
+            node = parent[node]
+        path.reverse()
+        return path
+    
+    def _path_result(self, parent, goal, rows, cols):
+        """Build the path/distance/used_teleport result for a search"""
+        if goal == -1:
+            return {'path': [], 'distance': -1, 'used_teleport': False}
+        
+        path = self._reconstruct_path(parent, goal, rows, cols)
+        return {
+            'path': path,
+            'distance': len(path) - 1,
+            'used_teleport': goal >= rows * cols
+        }
+    
+    def _use_numpy(self, rows, cols):
+        """Decide whether a search on this grid runs on the NumPy engine"""
+        if self.engine == 'auto':
+            return np is not None and rows * cols >= self.NUMPY_MIN_CELLS
+        return self.engine == 'numpy'
+    
+    def _numpy_search(self, rows, cols, cells, start, end, allow_teleport, max_distance=None):
+        """
+        Layered BFS over NumPy boolean masks
+        
+        The grid is padded with a two-cell obstacle border so every knight
+        offset is a constant shift of the flat cell index. Each BFS layer is
+        expanded with all 8 offsets at once on the frontier index array, and
+        candidates are filtered through a single boolean "open" mask per
+        layer (empty and not yet visited), so a layer costs O(frontier)
+        instead of O(rows * cols). Layer 0 is the grid before teleporting
+        and layer 1 after; the portal is entered from the start at distance
+        0 and exits onto every other empty cell at distance 1.
+        
+        Returns:
+            tuple: (dist, goal_layer) where dist is an int32 array of shape
+            (layers, rows, cols) with -1 for unreached cells and goal_layer
+            is the layer the end was reached in, or -1
+        """
+        width = cols + 4
+        layers = 2 if allow_teleport else 1
+        padded = np.zeros((rows + 4, width), dtype=bool)
+        padded[2:-2, 2:-2] = np.frombuffer(cells, dtype=np.uint8).reshape(rows, cols) == 0
+        open_cells = np.tile(padded.ravel(), (layers, 1))
+        dist = np.full((layers, (rows + 4) * width), -1, dtype=np.int32)
+        offsets = np.array([dr * width + dc for dr, dc in self.knight_moves], dtype=np.intp)
+        
+        source = (start[0] + 2) * width + start[1] + 2
+        target = (end[0] + 2) * width + end[1] + 2
+        dist[0, source] = 0
+        open_cells[0, source] = False
+        frontiers = [np.array([source], dtype=np.intp)] + [np.empty(0, dtype=np.intp)] * (layers - 1)
+        
+        def unpadded():
+            return dist.reshape(layers, rows + 4, width)[:, 2:-2, 2:-2]
+        
+        if source == target:
+            return unpadded(), 0
+        
+        step = 0
+        while any(frontier.size for frontier in frontiers):
+            step += 1
+            if max_distance is not None and step > max_distance:
+                break
+            for layer in range(layers):
+                self.nodes_expanded += frontiers[layer].size
+                candidates = (frontiers[layer][:, None] + offsets).ravel()
+                if layer == 1 and step == 1:
+                    # Leave the portal onto every empty cell except the start
+                    candidates = np.flatnonzero(open_cells[1])
+                    candidates = candidates[candidates != source]
+                layer_open = open_cells[layer]
+                candidates = np.unique(candidates[layer_open[candidates]])
+                layer_open[candidates] = False
+                dist[layer, candidates] = step
+                frontiers[layer] = candidates
+            
+            reached = dist[:, target] >= 0
+            if reached.any():
+                return unpadded(), 0 if reached[0] else 1
+        
+        return unpadded(), -1
+    
+    def _numpy_path(self, rows, cols, cells, start, end, allow_teleport, max_distance=None):
+        """Run the NumPy engine and rebuild the path by walking distances back"""
+        start, end = tuple(start), tuple(end)
+        dist, layer = self._numpy_search(rows, cols, cells, start, end,
+                                         allow_teleport, max_distance)
+        if layer == -1:
+            return {'path': [], 'distance': -1, 'used_teleport': False}
+        
+        field = dist[layer]
+        row, col = end
+        d = int(field[row, col])
+        path = [end]
+        while d > 0:
+            if layer == 1 and d == 1:
+                # Stepped out of the portal, which was entered from the start
+                row, col = start
+            else:
+                for dr, dc in self.knight_moves:
+                    prev_row, prev_col = row + dr, col + dc
+                    if (0 <= prev_row < rows and 0 <= prev_col < cols and
+                            field[prev_row, prev_col] == d - 1):
+                        row, col = prev_row, prev_col
+                        break
+            path.append((row, col))
+            d -= 1
+        path.reverse()
+        
+        return {
+            'path': path,
+            'distance': len(path) - 1,
+            'used_teleport': layer == 1
+        }
+    
+    def _bidirectional_search(self, rows, cols, cells, start, end, max_distance=None):
+        """
+        Bidirectional BFS using only knight moves
+        
+        Grows one frontier from each end, always expanding the smaller one
+        by a full layer, and stops at the first layer in which the two
+        frontiers meet. Knight moves are symmetric, so the backward search
+        uses the same moves as the forward one.
+        
+        Args:
+            rows, cols: Grid dimensions
+            cells: Flat row-major bytearray (0 = empty)
+            start, end: (row, col) cells
+            max_distance: Optional bound; stop once no path this short remains
+            
+        Returns:
+            list: Path from start to end, or None if there is none
+        """
+        n = rows * cols
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        if source == target:
+            return [tuple(start)]
+        
+        dists = (array('i', [-1]) * n, array('i', [-1]) * n)
+        parents = (array('i', [-1]) * n, array('i', [-1]) * n)
+        dists[0][source] = dists[1][target] = 0
+        frontiers = [[source], [target]]
+        depths = [0, 0]
+        moves = self.knight_moves
+        
+        while frontiers[0] and frontiers[1]:
+            if max_distance is not None and depths[0] + depths[1] + 1 > max_distance:
+                return None
+            
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            dist, parent, other = dists[side], parents[side], dists[1 - side]
+            best, meeting = -1, None
+            next_frontier = []
+            
+            for node in frontiers[side]:
+                self.nodes_expanded += 1
+                d = dist[node] + 1
+                row, col = divmod(node, cols)
+                for dr, dc in moves:
+                    new_row, new_col = row + dr, col + dc
+                    if not (0 <= new_row < rows and 0 <= new_col < cols):
+                        continue
+                    cell = new_row * cols + new_col
+                    if cells[cell] != 0:
+                        continue
+                    if other[cell] != -1 and (best == -1 or d + other[cell] < best):
+                        best, meeting = d + other[cell], (node, cell)
+                    if dist[cell] == -1:
+                        dist[cell] = d
+                        parent[cell] = node
+                        next_frontier.append(cell)
+            
+            if meeting is not None:
+                if max_distance is not None and best > max_distance:
+                    return None
+                near, far = meeting if side == 0 else meeting[::-1]
+                forward = self._trace_parents(parents[0], near)
+                backward = self._trace_parents(parents[1], far)
+                forward.reverse()
+                return [divmod(cell, cols) for cell in forward + backward]
+            
+            frontiers[side] = next_frontier
+            depths[side] += 1
+        
+        return None
+    
+    def _trace_parents(self, parent, node):
+        """List nodes from node back to the root of its search tree"""
+        nodes = []
+        while node != -1:
+            nodes.append(node)
+            node = parent[node]
+        return nodes
+    
+    def _bidirectional_teleport_path(self, rows, cols, cells, start, end):
+        """
+        Find shortest path with one teleportation using bidirectional BFS
+        
+        A teleporting path walks from the start to some empty cell, jumps,
+        and walks from an empty cell to the end, so its cost is bounded below
+        by the distance from the start to its nearest empty cell, plus one,
+        plus the distance from the end to its nearest empty cell. Both ends
+        are empty themselves, so that bound is exactly 1 and is attained by
+        jumping straight to the end; the knight search only has to look for
+        walks that are no longer.
+        """
+        start, end = tuple(start), tuple(end)
+        if start == end:
+            return {'path': [start], 'distance': 0, 'used_teleport': False}
+        
+        teleport_distance = 1
+        path = self._bidirectional_search(rows, cols, cells, start, end, teleport_distance)
+        if path is not None:
+            return {'path': path, 'distance': len(path) - 1, 'used_teleport': False}
+        
+        return {'path': [start, end], 'distance': teleport_distance, 'used_teleport': True}
     
     def _create_visualization(self, grid, path):
         """Create visualization of the path on the grid"""
         if not path:
             return []
         
-        rows, cols = len(grid), len(grid[0])
-        viz = [['.' if grid[i][j] == 0 else '#' for j in range(cols)] for i in range(rows)]
+        viz = [['.' if cell == 0 else '#' for cell in row] for row in grid]
         
         # Mark path
         for i, (row, col) in enumerate(path):
@@ -162,4 +496,114 @@ class KnightsPortals:
             else:
                 viz[row][col] = str(i % 10)  # Path step
         
-        return [''.join(row) for row in viz]
\ No newline at end of file
+        return [''.join(row) for row in viz]
+
+
+class PreparedKnightsGrid:
+    """
+    Knights and Portals grid prepared for repeated queries
+    
+    Keeps the flattened obstacle grid and caches the full distance and
+    predecessor fields of the most recently searched sources. Knight moves
+    and teleports are symmetric, so a field computed from either end of a
+    query answers it: the distance in O(1) and the path in O(path).
+    """
+    
+    def __init__(self, knights, grid, max_fields=4):
+        self.knights = knights
+        if not grid or not grid[0]:
+            self.rows, self.cols, self.cells = 0, 0, bytearray()
+        else:
+            self.rows, self.cols, self.cells = knights._flatten_grid(grid)
+        self.max_fields = max_fields
+        self._fields = OrderedDict()
+    
+    def distance_field(self, source):
+        """
+        Get the (dist, parent) arrays of a full search from source
+        
+        Args:
+            source: (row, col) of an empty cell
+            
+        Returns:
+            tuple: (dist, parent) arrays over cell, teleport and portal nodes
+        """
+        field = self._fields.get(source)
+        if field is not None:
+            self._fields.move_to_end(source)
+            return field
+        
+        dist, parent, _ = self.knights._search(
+            self.rows, self.cols, self.cells, source, None, True)
+        self._fields[source] = (dist, parent)
+        if len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return dist, parent
+    
+    def query(self, start, end):
+        """
+        Find shortest path between two cells with optional teleportation
+        
+        Args:
+            start: (row, col) start cell
+            end: (row, col) end cell
+            
+        Returns:
+            dict: path, distance and used_teleport as in shortest_path
+        """
+        start, end = tuple(start), tuple(end)
+        if not (self._is_empty(start) and self._is_empty(end)):
+            return {'path': [], 'distance': -1, 'used_teleport': False}
+        
+        # Reuse a field searched from the end cell and walk it backwards
+        reverse = start not in self._fields and end in self._fields
+        source, target = (end, start) if reverse else (start, end)
+        dist, parent = self.distance_field(source)
+        
+        n = self.rows * self.cols
+        cell = target[0] * self.cols + target[1]
+        walk_distance, teleport_distance = dist[cell], dist[n + cell]
+        
+        # Prefer the plain knight path on ties, like shortest_path
+        if walk_distance != -1 and (teleport_distance == -1 or
+                                    walk_distance <= teleport_distance):
+            goal = cell
+        elif teleport_distance != -1:
+            goal = n + cell
+        else:
+            return {'path': [], 'distance': -1, 'used_teleport': False}
+        
+        path = self.knights._reconstruct_path(parent, goal, self.rows, self.cols)
+        if reverse:
+            path.reverse()
+        
+        return {
+            'path': path,
+            'distance': dist[goal],
+            'used_teleport': goal >= n
+        }
+    
+    def query_many(self, queries):
+        """
+        Answer a list of (start, end) queries
+        
+        Queries are evaluated grouped by start cell so each distance field
+        is searched once, and results are returned in the original order.
+        
+        Args:
+            queries: List of (start, end) pairs
+            
+        Returns:
+            list: One result dict per query
+        """
+        queries = [(tuple(start), tuple(end)) for start, end in queries]
+        results = [None] * len(queries)
+        for i in sorted(range(len(queries)), key=lambda i: queries[i][0]):
+            results[i] = self.query(*queries[i])
+        return results
+    
+    def _is_empty(self, cell):
+        """Check that cell is inside the grid and not an obstacle"""
+        row, col = cell
+        return (0 <= row < self.rows and 0 <= col < self.cols and
+                self.cells[row * self.cols + col] == 0)
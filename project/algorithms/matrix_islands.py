@@ -1,3 +1,35 @@
+import gc
+import json
+import os
+import re
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+from multiprocessing import shared_memory
+from operator import getitem, itemgetter
+
+from .grid_encoding import PackedGrid
+from .tracing import lazy_trace
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, it only vectorizes labeling of large grids
+    np = None
+
+# Runs of land in a flattened matrix row
+_LAND_RUN = re.compile(b'\x01+')
+
+# Maps every byte to 1 for land (exactly 1) and 0 otherwise
+_LAND_TABLE = bytes(1 if value == 1 else 0 for value in range(256))
+
+# Maps the character '1' to land and everything else to water
+_TEXT_LAND_TABLE = bytes(1 if value == ord('1') else 0 for value in range(256))
+
+# Maps matrix cells to visualization characters: '0' for water, '.' otherwise
+_VISUALIZATION_TABLE = b'0' + b'.' * 255
+
 class MatrixIslands:
     """
     Matrix Islands with Diagonals
@@ -6,6 +38,9 @@ class MatrixIslands:
     Islands are formed using horizontal, vertical, or diagonal connections.
     """
     
+    # Grids with at least this many cells are labeled with NumPy when available
+    NUMPY_MIN_CELLS = 40000
+    
     def __init__(self):
         # 8 directions: horizontal, vertical, and diagonal
         self.directions = [
@@ -14,12 +49,46 @@ class MatrixIslands:
             (1, -1),  (1, 0),  (1, 1)
         ]
     
-    def count_islands_with_diagonals(self, matrix):
+    def count_islands_with_diagonals(self, matrix, trace=True):
         """
         Count islands including diagonal connections
         
         Args:
             matrix: 2D matrix of 0s and 1s
+            trace: Include every island's cells and the visualization
+            
+        Returns:
+            dict: Island count, details, and visualization
+        """
+        if not matrix or not matrix[0]:
+            return {
+                'count': 0,
+                'islands': [],
+                'visualization': [] if trace else None
+            }
+        
+        rows, cols, cells = self._flatten_matrix(matrix)
+        _, count, runs = self._label_components(rows, cols, cells, with_labels=False)
+        return self._islands_result(matrix, count, self._island_sizes(count, runs), runs, trace)
+    
+    def count_islands_parallel(self, matrix, workers=None, tile_rows=None, trace=True):
+        """
+        Count islands by labeling horizontal tiles in worker processes
+        
+        The matrix is copied once into shared memory and each worker labels
+        its tile in place, so the tile is never pickled. Workers return
+        their island sizes and the runs of land on the tile's first and last
+        row; the parent only unions runs that touch across a tile border
+        (including the diagonal contacts at tile corners) and numbers
+        islands in row-major order, so the result is identical to
+        count_islands_with_diagonals. The tile's full runs are only sent
+        back when trace needs cells or the visualization.
+        
+        Args:
+            matrix: 2D matrix of 0s and 1s
+            workers: Number of worker processes (defaults to the CPU count)
+            tile_rows: Rows per tile (defaults to an even split over workers)
+            trace: Include every island's cells and the visualization
             
         Returns:
             dict: Island count, details, and visualization
@@ -28,85 +97,537 @@ class MatrixIslands:
             return {
                 'count': 0,
                 'islands': [],
-                'visualization': []
+                'visualization': [] if trace else None
             }
         
         rows, cols = len(matrix), len(matrix[0])
-        visited = [[False] * cols for _ in range(rows)]
-        islands = []
-        
-        for i in range(rows):
-            for j in range(cols):
-                if matrix[i][j] == 1 and not visited[i][j]:
-                    # Found a new island
-                    island_cells = []
-                    self._dfs(matrix, i, j, visited, island_cells)
-                    islands.append({
-                        'id': len(islands) + 1,
-                        'cells': island_cells,
-                        'size': len(island_cells)
-                    })
-        
-        visualization = self._create_visualization(matrix, islands)
+        workers = workers or os.cpu_count() or 1
+        tile_rows = tile_rows or -(-rows // workers)
+        if tile_rows >= rows:
+            return self.count_islands_with_diagonals(matrix, trace)
+        
+        tiles = [(start, min(start + tile_rows, rows)) for start in range(0, rows, tile_rows)]
+        cells_shm = shared_memory.SharedMemory(create=True, size=rows * cols)
+        try:
+            rows, cols, cells = self._flatten_matrix(matrix)
+            cells_shm.buf[:rows * cols] = cells
+            del cells
+            
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    _label_tile,
+                    *zip(*[(cells_shm.name, cols, start, end, bool(trace))
+                           for start, end in tiles])
+                ))
+        finally:
+            cells_shm.close()
+            cells_shm.unlink()
+        
+        count, sizes, runs = self._merge_tiles(tiles, results)
+        return self._islands_result(matrix, count, sizes, runs, trace)
+    
+    def _merge_tiles(self, tiles, results):
+        """
+        Merge tile-local islands into global islands across the tile seams
+        
+        Tile-local id k is made global as k plus the number of islands in
+        earlier tiles, so global labels follow the row-major order of each
+        island's first cell, like the provisional labels of
+        _label_components. Only the runs on either side of every tile
+        border are linked, with the same overlap test as _link_runs.
+        
+        Args:
+            tiles: (row_start, row_end) of every tile
+            results: _label_tile result of every tile
+            
+        Returns:
+            tuple: (count, sizes, runs) with sizes indexed by island id and
+            runs the global run arrays, or None if no tile returned runs
+        """
+        offsets = []
+        total = 0
+        for tile_count, _, _, _ in results:
+            offsets.append(total)
+            total += tile_count
+        
+        parent = array('i', range(total + 1))
+        for (_, _, (_, upper), _), upper_offset, (_, _, (lower, _), _), lower_offset in zip(
+            results, offsets, results[1:], offsets[1:]
+        ):
+            j = 0
+            for start, end, label in lower:
+                while j < len(upper) and upper[j][1] < start:
+                    j += 1
+                k = j
+                while k < len(upper) and upper[k][0] <= end:
+                    self._union(parent, lower_offset + label, upper_offset + upper[k][2])
+                    k += 1
+        
+        count, final = self._number_roots(parent)
+        sizes = [0] * (count + 1)
+        for (_, tile_sizes, _, _), offset in zip(results, offsets):
+            for label, size in enumerate(tile_sizes[1:], offset + 1):
+                sizes[final[label]] += size
+        
+        if results[0][3] is None:
+            return count, sizes, None
+        
+        runs = tuple(array('i') for _ in range(4))
+        for (row_start, _), (_, _, _, (run_rows, run_starts, run_ends, run_ids)), offset in zip(
+            tiles, results, offsets
+        ):
+            runs[1].extend(run_starts)
+            runs[2].extend(run_ends)
+            if np is None:
+                runs[0].extend(map(row_start.__add__, run_rows))
+                runs[3].extend(map(final.__getitem__, map(offset.__add__, run_ids)))
+                continue
+            runs[0].extend(_int_array(np.frombuffer(run_rows, dtype=np.int32) + row_start))
+            runs[3].extend(_int_array(np.frombuffer(final, dtype=np.int32)[
+                np.frombuffer(run_ids, dtype=np.int32) + offset
+            ]))
+        return count, sizes, runs
+    
+    def count_islands_streaming(self, rows, trace=True):
+        """
+        Count islands from an iterator of rows
+        
+        Only the previous row's runs of land and a union-find over the
+        labels of one row (with per-label size and bounding box) are kept:
+        after every row, components that no longer touch it are finished
+        and the rest are renumbered. Memory is O(cols + islands) no matter
+        how many rows are streamed or how many runs they contain.
+        
+        Args:
+            rows: Iterable of rows; each row is a list of 0s and 1s, a
+                string of digits such as '0110', or a JSON array string
+                such as an NDJSON line. Blank lines are skipped.
+            trace: Track every island's bounding box (None without it)
+            
+        Returns:
+            dict: Island count, matrix dimensions, and per-island size and
+            bounding box (min_row, min_col, max_row, max_col)
+        """
+        # Statistics of the components on the previous row, indexed by the
+        # label of its runs (index 0 is water). firsts orders components by
+        # the provisional label of their first run, i.e. by first cell.
+        stats = (array('q', [0]), array('q', [0]),
+                 array('i', [0]), array('i', [0]), array('i', [0]), array('i', [0]))
+        finished = []  # (first, size, bounding box) of completed islands
+        previous = []
+        created = 0
+        row_count, cols = 0, None
+        
+        for row in rows:
+            cells = self._stream_row(row)
+            if cells is None:
+                continue
+            if cols is None:
+                cols = len(cells)
+            elif len(cells) != cols:
+                raise ValueError('All matrix rows must have the same length')
+            
+            firsts, sizes, min_rows, min_cols, max_rows, max_cols = stats
+            parent = array('i', range(len(sizes)))
+            current = self._link_runs(
+                previous,
+                [(m.start(), m.end()) for m in _LAND_RUN.finditer(cells)],
+                parent
+            )
+            for _ in range(len(parent) - len(sizes)):
+                firsts.append(created)
+                created += 1
+                sizes.append(0)
+                min_rows.append(row_count)
+                max_rows.append(row_count)
+                min_cols.append(cols)
+                max_cols.append(-1)
+            
+            # Statistics are kept per label and folded into roots below
+            for start, end, label in current:
+                sizes[label] += end - start
+                if not trace:
+                    continue
+                max_rows[label] = row_count
+                if start < min_cols[label]:
+                    min_cols[label] = start
+                if end - 1 > max_cols[label]:
+                    max_cols[label] = end - 1
+            
+            previous, stats = self._finish_stream_row(parent, current, stats, finished, trace)
+            row_count += 1
+        
+        # Whatever still touches the last row is complete as well
+        self._finish_stream_row(array('i', range(len(stats[1]))), [], stats, finished, trace)
+        finished.sort(key=itemgetter(0))
         
         return {
-            'count': len(islands),
-            'islands': islands,
-            'visualization': visualization
+            'count': len(finished),
+            'rows': row_count,
+            'cols': cols or 0,
+            'islands': [
+                {'id': i, 'size': size, 'bounding_box': box}
+                for i, (_, size, box) in enumerate(finished, 1)
+            ]
         }
     
-    def _dfs(self, matrix, row, col, visited, island_cells):
+    def _finish_stream_row(self, parent, current, stats, finished, trace):
         """
-        Depth-first search to explore island
+        Fold a streamed row's labels into their roots and retire completed islands
+        
+        A root that no run of the current row belongs to can never grow
+        again, so it is appended to finished as (first, size, bounding box).
+        The remaining roots are renumbered 1..k in row order, which keeps
+        the label space as small as one row.
         
         Args:
-            matrix: Input matrix
-            row, col: Current position
-            visited: Visited cells tracker
-            island_cells: List to store current island cells
+            parent: Union-find parent array over the row's labels
+            current: (start, end, label) runs of the row
+            stats: (firsts, sizes, min_rows, min_cols, max_rows, max_cols)
+                arrays indexed by label
+            finished: List collecting completed islands
+            trace: Whether bounding boxes are tracked
+            
+        Returns:
+            tuple: The row's runs relabeled and the compacted stats
         """
-        rows, cols = len(matrix), len(matrix[0])
+        firsts, sizes, min_rows, min_cols, max_rows, max_cols = stats
+        for label in range(1, len(parent)):
+            if parent[label] == label:
+                continue
+            root = self._find(parent, label)
+            sizes[root] += sizes[label]
+            if firsts[label] < firsts[root]:
+                firsts[root] = firsts[label]
+            if trace:
+                min_rows[root] = min(min_rows[root], min_rows[label])
+                min_cols[root] = min(min_cols[root], min_cols[label])
+                max_rows[root] = max(max_rows[root], max_rows[label])
+                max_cols[root] = max(max_cols[root], max_cols[label])
         
-        # Check bounds and conditions
-        if (row < 0 or row >= rows or col < 0 or col >= cols or
-            visited[row][col] or matrix[row][col] == 0):
-            return
+        roots = [self._find(parent, label) for _, _, label in current]
+        live = dict.fromkeys(roots)
+        for label in range(1, len(parent)):
+            if parent[label] == label and label not in live:
+                finished.append((firsts[label], sizes[label], {
+                    'min_row': min_rows[label],
+                    'min_col': min_cols[label],
+                    'max_row': max_rows[label],
+                    'max_col': max_cols[label]
+                } if trace else None))
         
-        # Mark as visited and add to current island
-        visited[row][col] = True
-        island_cells.append((row, col))
+        for new_label, root in enumerate(live, 1):
+            live[root] = new_label
+        keep = [0, *live]
+        stats = tuple(array(values.typecode, map(values.__getitem__, keep)) for values in stats)
+        return [(start, end, live[root]) for (start, end, _), root in zip(current, roots)], stats
+    
+    def _stream_row(self, row):
+        """Convert one streamed row into bytes with 1 for land, or None if blank"""
+        if isinstance(row, (bytes, bytearray)):
+            row = row.decode()
+        if isinstance(row, str):
+            row = row.strip()
+            if not row:
+                return None
+            if not row.startswith('['):
+                return row.replace(',', '').replace(' ', '').encode().translate(_TEXT_LAND_TABLE)
+            row = json.loads(row)
+        try:
+            return bytes(row).translate(_LAND_TABLE)
+        except (TypeError, ValueError):
+            return bytes(cell == 1 for cell in row)
+    
+    def _flatten_matrix(self, matrix):
+        """
+        Flatten matrix into a row-major bytearray with 1 for land
         
-        # Explore all 8 directions
-        for dr, dc in self.directions:
-            self._dfs(matrix, row + dr, col + dc, visited, island_cells)
+        A PackedGrid is already flat and is used as is, without copying.
+        """
+        if isinstance(matrix, PackedGrid):
+            return matrix.rows, matrix.cols, matrix.cells
+        
+        rows, cols = len(matrix), len(matrix[0])
+        cells = bytearray(rows * cols)
+        for r, row in enumerate(matrix):
+            if len(row) != cols:
+                raise ValueError('All matrix rows must have the same length')
+            try:
+                packed = bytes(row).translate(_LAND_TABLE)
+            except (TypeError, ValueError):
+                packed = bytes(cell == 1 for cell in row)
+            cells[r * cols:(r + 1) * cols] = packed
+        return rows, cols, cells
     
-    def _create_visualization(self, matrix, islands):
+    def _label_components(self, rows, cols, cells, with_labels=True):
         """
-        Create visualization showing different islands
+        Two-pass connected-component labeling with union-find
+        
+        The first pass walks the runs of land in each row, gives every run
+        a provisional label and unions it with the runs it touches in the
+        previous row (overlapping or diagonally adjacent). The second pass
+        resolves provisional labels to their roots, numbering islands in
+        row-major order of their first cell. Nothing recurses, so island
+        size is not limited by the Python stack. Large grids are labeled
+        with NumPy when it is available (see _label_components_numpy).
         
         Args:
-            matrix: Original matrix
-            islands: List of island information
+            rows, cols: Matrix dimensions
+            cells: Flat row-major bytes-like object with 1 for land
+            with_labels: Also fill a flat per-cell label array
             
         Returns:
-            list: Visualization grid with island IDs
+            tuple: (labels, count, runs) where labels is a flat array('i')
+            of island ids (0 for water), or None without with_labels, and
+            runs is a tuple of four parallel array('i')s (rows, starts,
+            ends, island_ids) describing every run of land in row-major
+            order, ends exclusive
         """
-        rows, cols = len(matrix), len(matrix[0])
-        viz = [['.' for _ in range(cols)] for _ in range(rows)]
+        if np is not None and rows * cols >= self.NUMPY_MIN_CELLS:
+            return self._label_components_numpy(rows, cols, cells, with_labels)
+        
+        parent = array('i', [0])  # label 0 is water
+        run_rows, run_starts, run_ends = array('i'), array('i'), array('i')
+        run_labels = array('i')
+        previous = []
         
-        # Mark islands with their IDs
-        for island in islands:
-            island_id = str(island['id'] % 10)  # Use single digit for display
-            for row, col in island['cells']:
-                viz[row][col] = island_id
+        row_runs = _LAND_RUN.finditer
+        view = memoryview(cells)
+        for r in range(rows):
+            offset = r * cols
+            current = self._link_runs(
+                previous,
+                [m.span() for m in row_runs(view[offset:offset + cols])],
+                parent
+            )
+            if current:
+                starts, ends, labels = zip(*current)
+                run_rows.extend(repeat(r, len(current)))
+                run_starts.extend(starts)
+                run_ends.extend(ends)
+                run_labels.extend(labels)
+            previous = current
         
-        # Mark water as '0'
-        for i in range(rows):
-            for j in range(cols):
-                if matrix[i][j] == 0:
-                    viz[i][j] = '0'
+        count, final = self._number_roots(parent)
+        run_ids = array('i', map(final.__getitem__, run_labels))
         
-        return [''.join(row) for row in viz]
+        labels = None
+        if with_labels:
+            labels = array('i', [0]) * (rows * cols)
+            for r, start, end, island_id in zip(run_rows, run_starts, run_ends, run_ids):
+                offset = r * cols
+                labels[offset + start:offset + end] = array('i', [island_id]) * (end - start)
+        
+        return labels, count, (run_rows, run_starts, run_ends, run_ids)
+    
+    def _label_components_numpy(self, rows, cols, cells, with_labels):
+        """
+        Vectorized _label_components with the same result
+        
+        Runs are found with one np.diff over the padded grid. The runs of
+        the previous row touching each run form a contiguous range, found
+        with two searchsorted calls over (row, column) keys. Components are
+        then merged by hooking the larger root of every edge onto the
+        smaller one, followed by pointer jumping, until every edge joins
+        equal roots. Each component ends at its smallest run index, which is
+        the row-major order of the sequential labeler.
+        """
+        land = np.frombuffer(cells, dtype=np.uint8, count=rows * cols).reshape(rows, cols) == 1
+        padded = np.zeros((rows, cols + 2), dtype=np.int8)
+        padded[:, 1:-1] = land
+        steps = np.diff(padded, axis=1)
+        stride = cols + 1
+        run_starts = np.flatnonzero(steps == 1)
+        run_ends = np.flatnonzero(steps == -1)
+        del padded, steps
+        run_rows = run_starts // stride
+        run_starts -= run_rows * stride
+        run_ends -= run_rows * stride
+        
+        # Keys order runs row by row; a row spans fewer than width keys
+        width = cols + 2
+        end_keys = run_rows * width + run_ends
+        start_keys = run_rows * width + run_starts
+        first = np.searchsorted(end_keys, (run_rows - 1) * width + run_starts, 'left')
+        last = np.searchsorted(start_keys, (run_rows - 1) * width + run_ends, 'right')
+        counts = np.maximum(last - first, 0)
+        
+        runs = len(run_starts)
+        sources = np.repeat(np.arange(runs), counts)
+        offsets = np.arange(len(sources)) - np.repeat(np.cumsum(counts) - counts, counts)
+        targets = np.repeat(first, counts) + offsets
+        
+        root = np.arange(runs)
+        while len(sources):
+            # Labels are fully compressed here, so both ends are roots
+            a, b = root[sources], root[targets]
+            pending = a != b
+            sources, targets, a, b = sources[pending], targets[pending], a[pending], b[pending]
+            np.minimum.at(root, np.maximum(a, b), np.minimum(a, b))
+            while True:
+                jumped = root[root]
+                if np.array_equal(jumped, root):
+                    break
+                root = jumped
+        
+        is_root = root == np.arange(runs)
+        count = int(is_root.sum())
+        run_ids = (np.cumsum(is_root, dtype=np.int32))[root]
+        
+        labels = None
+        if with_labels:
+            flat = np.zeros(rows * cols, dtype=np.int32)
+            flat[np.flatnonzero(land)] = np.repeat(run_ids, run_ends - run_starts)
+            labels = _int_array(flat)
+        
+        return labels, count, tuple(map(_int_array, (run_rows, run_starts, run_ends, run_ids)))
+    
+    def _number_roots(self, parent):
+        """
+        Resolve union-find labels to island ids
+        
+        Roots are the smallest label of each component, so resolving in
+        label order numbers islands by their first cell in row-major order.
+        
+        Returns:
+            tuple: (count, final) where final maps every label to its island id
+        """
+        final = array('i', [0]) * len(parent)
+        count = 0
+        for label in range(1, len(parent)):
+            root = self._find(parent, label)
+            if root == label:
+                count += 1
+                final[label] = count
+            else:
+                final[label] = final[root]
+        return count, final
+    
+    def _link_runs(self, previous, runs, parent):
+        """
+        Label a row's runs of land against the previous row's runs
+        
+        Args:
+            previous: List of (start, end, label) runs of the previous row
+            runs: List of (start, end) runs of the current row, end exclusive
+            parent: Union-find parent array, extended with new labels
+            
+        Returns:
+            list: (start, end, label) for each run of the current row
+        """
+        linked = []
+        append = linked.append
+        union = self._union
+        j = 0
+        count = len(previous)
+        for start, end in runs:
+            # Previous runs ending before column start - 1 cannot touch this one
+            while j < count and previous[j][1] < start:
+                j += 1
+            
+            if j == count or previous[j][0] > end:
+                label = len(parent)
+                parent.append(label)
+            else:
+                label = previous[j][2]
+                k = j + 1
+                while k < count and previous[k][0] <= end:
+                    other = previous[k][2]
+                    if other != label:
+                        label = union(parent, label, other)
+                    k += 1
+            append((start, end, label))
+        return linked
+    
+    def _use_numpy(self, runs):
+        """Whether post-processing of these runs is vectorized"""
+        return np is not None and len(runs[0]) >= self.NUMPY_MIN_CELLS // 10
+    
+    def _island_sizes(self, count, runs):
+        """Number of cells of every island, indexed by island id (index 0 unused)"""
+        run_rows, run_starts, run_ends, run_ids = runs
+        if self._use_numpy(runs):
+            lengths = np.frombuffer(run_ends, dtype=np.int32) - np.frombuffer(run_starts, dtype=np.int32)
+            return np.bincount(np.frombuffer(run_ids, dtype=np.int32), lengths, count + 1).astype(np.int64).tolist()
+        sizes = [0] * (count + 1)
+        for start, end, island_id in zip(run_starts, run_ends, run_ids):
+            sizes[island_id] += end - start
+        return sizes
+    
+    def _island_cells(self, count, runs):
+        """(row, col) cells of every island in row-major order, as one list per island"""
+        with _gc_paused():
+            if not self._use_numpy(runs):
+                island_cells = [[] for _ in range(count)]
+                for r, start, end, island_id in zip(*runs):
+                    island_cells[island_id - 1].extend(zip(repeat(r, end - start), range(start, end)))
+                return island_cells
+            
+            # Expand runs to cells, order them by island (stable, so each
+            # island stays row-major) and cut one list per island
+            cell_rows, cell_cols = _expand_runs(runs)
+            cell_ids = np.repeat(np.frombuffer(runs[3], dtype=np.int32), _run_lengths(runs))
+            order = np.argsort(cell_ids, kind='stable')
+            cells = list(zip(cell_rows[order].tolist(), cell_cols[order].tolist()))
+            bounds = np.cumsum(np.bincount(cell_ids, minlength=count + 1)).tolist()
+            return [cells[bounds[i]:bounds[i + 1]] for i in range(count)]
+    
+    def _islands_result(self, matrix, count, sizes, runs, trace):
+        """Result dict of the island counters from island sizes and labeled runs"""
+        island_cells = lazy_trace(trace, self._island_cells, count, runs)
+        with _gc_paused():
+            islands = [
+                {'id': i + 1, 'cells': lazy_trace(trace, getitem, island_cells, i), 'size': sizes[i + 1]}
+                for i in range(count)
+            ]
+        return {
+            'count': count,
+            'islands': islands,
+            'visualization': lazy_trace(trace, self._visualize_runs, matrix, runs)
+        }
+    
+    def _find(self, parent, label):
+        """Find the root label with path halving"""
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+    
+    def _union(self, parent, a, b):
+        """Merge two labels, keeping the smaller root, and return that root"""
+        a, b = self._find(parent, a), self._find(parent, b)
+        if a == b:
+            return a
+        if a > b:
+            a, b = b, a
+        parent[b] = a
+        return a
+    
+    def _visualize_runs(self, matrix, runs):
+        """
+        Visualization from labeled runs: island ids (last digit) on land,
+        '0' for water, '.' for any other value
+        """
+        viz = []
+        for row in matrix:
+            try:
+                viz.append(bytearray(bytes(row).translate(_VISUALIZATION_TABLE)))
+            except (TypeError, ValueError):
+                viz.append(bytearray(ord('0') if cell == 0 else ord('.') for cell in row))
+        
+        if self._use_numpy(runs):
+            cols = len(viz[0])
+            flat = np.frombuffer(b''.join(viz), dtype=np.uint8).copy()
+            cell_rows, cell_cols = _expand_runs(runs)
+            digits = np.frombuffer(runs[3], dtype=np.int32) % 10 + ord('0')
+            flat[cell_rows.astype(np.int64) * cols + cell_cols] = np.repeat(digits, _run_lengths(runs))
+            text = flat.tobytes().decode()
+            return [text[offset:offset + cols] for offset in range(0, len(text), cols)]
+        
+        digits = [str(digit).encode() for digit in range(10)]
+        for r, start, end, island_id in zip(*runs):
+            viz[r][start:end] = digits[island_id % 10] * (end - start)
+        return [row.decode() for row in viz]
     
     def get_island_statistics(self, islands):
         """
@@ -135,4 +656,223 @@ class MatrixIslands:
             'average_size': sum(sizes) / len(sizes),
             'largest_island': max(islands, key=lambda x: x['size']),
             'smallest_island': min(islands, key=lambda x: x['size'])
-        }
\ No newline at end of file
+        }
+
+
+class IslandTracker:
+    """
+    Incremental island maintenance under cell flips
+    
+    The matrix is labeled once with MatrixIslands, then kept up to date:
+    set_land unions the new cell with its land neighbours in near-constant
+    time, and set_water relabels only the component that contained the
+    removed cell, which may split into several islands. Every label of
+    that component is dead afterwards and is reused by later changes, so
+    the union-find arrays stay bounded by the number of live labels.
+    """
+    
+    def __init__(self, matrix):
+        """
+        Args:
+            matrix: Initial 2D matrix of 0s and 1s
+        """
+        self.islands = MatrixIslands()
+        if not matrix or not matrix[0]:
+            self.rows, self.cols, self.cells = 0, 0, bytearray()
+        else:
+            self.rows, self.cols, cells = self.islands._flatten_matrix(matrix)
+            self.cells = bytearray(cells)
+        
+        # labels[cell] is a union-find label (0 for water); roots carry sizes
+        self.labels, self.count, runs = self.islands._label_components(
+            self.rows, self.cols, self.cells)
+        self.parent = array('i', range(self.count + 1))
+        self.sizes = array('q', self.islands._island_sizes(self.count, runs))
+        self.free_labels = []
+    
+    def set_land(self, row, col):
+        """
+        Turn a cell into land, merging the islands it touches
+        
+        Returns:
+            int: Island count after the change
+        """
+        cell = self._cell_index(row, col)
+        if self.cells[cell]:
+            return self.count
+        
+        label = self._new_label(1)
+        self.cells[cell] = 1
+        self.labels[cell] = label
+        self.count += 1
+        for neighbour in self._land_neighbours(cell):
+            a = self.islands._find(self.parent, label)
+            b = self.islands._find(self.parent, self.labels[neighbour])
+            if a != b:
+                root = self.islands._union(self.parent, a, b)
+                self.sizes[root] = self.sizes[a] + self.sizes[b]
+                self.count -= 1
+        return self.count
+    
+    def set_water(self, row, col):
+        """
+        Turn a cell into water, splitting its island if needed
+        
+        Only the cells of the island that contained the removed cell are
+        visited: each remaining piece is flooded iteratively from the
+        removed cell's land neighbours and given a fresh root label.
+        
+        Returns:
+            int: Island count after the change
+        """
+        cell = self._cell_index(row, col)
+        if not self.cells[cell]:
+            return self.count
+        
+        # Every cell of the old island is relabeled below, so none of its
+        # labels stay referenced; they are freed once the pieces are labeled
+        dead = {self.labels[cell]}
+        self.cells[cell] = 0
+        self.labels[cell] = 0
+        self.count -= 1
+        
+        relabeled = set()
+        for neighbour in self._land_neighbours(cell):
+            if neighbour in relabeled:
+                continue
+            label = self._new_label(0)
+            stack = [neighbour]
+            relabeled.add(neighbour)
+            while stack:
+                current = stack.pop()
+                dead.add(self.labels[current])
+                self.labels[current] = label
+                self.sizes[label] += 1
+                for adjacent in self._land_neighbours(current):
+                    if adjacent not in relabeled:
+                        relabeled.add(adjacent)
+                        stack.append(adjacent)
+            self.count += 1
+        self.free_labels.extend(dead)
+        return self.count
+    
+    def set_cell(self, row, col, value):
+        """Set a cell to land (1) or water (0) and return the island count"""
+        return self.set_land(row, col) if value == 1 else self.set_water(row, col)
+    
+    def island_size(self, row, col):
+        """Size of the island containing a cell (0 for water)"""
+        cell = self._cell_index(row, col)
+        if not self.cells[cell]:
+            return 0
+        return self.sizes[self.islands._find(self.parent, self.labels[cell])]
+    
+    def to_matrix(self):
+        """Current matrix as nested lists of 0s and 1s"""
+        return [list(self.cells[r * self.cols:(r + 1) * self.cols]) for r in range(self.rows)]
+    
+    def visualization(self):
+        """Visualization of the current matrix, as count_islands_with_diagonals draws it"""
+        if not self.rows:
+            return []
+        _, _, runs = self.islands._label_components(self.rows, self.cols, self.cells, with_labels=False)
+        return self.islands._visualize_runs(self.to_matrix(), runs)
+    
+    def _new_label(self, size):
+        """Create a new root label with the given size, reusing a freed one if possible"""
+        if self.free_labels:
+            label = self.free_labels.pop()
+            self.parent[label] = label
+            self.sizes[label] = size
+            return label
+        label = len(self.parent)
+        self.parent.append(label)
+        self.sizes.append(size)
+        return label
+    
+    def _cell_index(self, row, col):
+        """Flat index of a cell, checking bounds"""
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise ValueError(f'Cell ({row}, {col}) is outside the matrix')
+        return row * self.cols + col
+    
+    def _land_neighbours(self, cell):
+        """Flat indices of the land cells around a cell (8 directions)"""
+        row, col = divmod(cell, self.cols)
+        neighbours = []
+        for dr, dc in self.islands.directions:
+            r, c = row + dr, col + dc
+            if 0 <= r < self.rows and 0 <= c < self.cols and self.cells[r * self.cols + c]:
+                neighbours.append(r * self.cols + c)
+        return neighbours
+
+
+def _label_tile(cells_name, cols, row_start, row_end, with_runs):
+    """
+    Label one horizontal tile inside a worker process
+    
+    Attaches to the shared cell buffer and labels rows [row_start, row_end)
+    in place.
+    
+    Returns:
+        tuple: (count, sizes, seams, runs) in tile-local ids, where sizes is
+        indexed by id, seams holds the (start, end, id) runs of the tile's
+        first and last row, and runs the tile's run arrays (rows relative to
+        row_start), or None without with_runs
+    """
+    islands = MatrixIslands()
+    cells_shm = shared_memory.SharedMemory(name=cells_name)
+    try:
+        tile = cells_shm.buf[row_start * cols:row_end * cols]
+        _, count, runs = islands._label_components(row_end - row_start, cols, tile, with_labels=False)
+        del tile
+    finally:
+        cells_shm.close()
+    
+    run_rows, run_starts, run_ends, run_ids = runs
+    first = bisect_left(run_rows, 1)
+    last = bisect_left(run_rows, row_end - row_start - 1)
+    seams = tuple(
+        list(zip(run_starts[lo:hi], run_ends[lo:hi], run_ids[lo:hi]))
+        for lo, hi in ((0, first), (last, len(run_rows)))
+    )
+    return count, islands._island_sizes(count, runs), seams, runs if with_runs else None
+
+
+def _int_array(values):
+    """Copy a NumPy integer array into an array('i')"""
+    result = array('i')
+    result.frombytes(values.astype(np.int32).tobytes())
+    return result
+
+
+def _run_lengths(runs):
+    """Length of every run of (rows, starts, ends, ids) run arrays"""
+    return np.frombuffer(runs[2], dtype=np.int32) - np.frombuffer(runs[1], dtype=np.int32)
+
+
+def _expand_runs(runs):
+    """Row and column arrays of every cell covered by the runs, in run order"""
+    lengths = _run_lengths(runs)
+    run_offsets = np.cumsum(lengths) - lengths
+    cell_rows = np.repeat(np.frombuffer(runs[0], dtype=np.int32), lengths)
+    cell_cols = (np.repeat(np.frombuffer(runs[1], dtype=np.int32) - run_offsets, lengths)
+                 + np.arange(int(lengths.sum())))
+    return cell_rows, cell_cols
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pause the cyclic garbage collector while building millions of results
+    
+    Island dicts and cell tuples hold no reference cycles, but creating
+    them keeps triggering collection passes over everything built so far.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -1,4 +1,96 @@
+import operator
 import re
+import time
+from collections import OrderedDict
+from functools import partial
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only evaluate_columns needs it
+    np = None
+
+from .tracing import lazy_trace
+
+# One alternative per token kind; blanks and comments are matched and skipped
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<number>\d+)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op><=|>=|==|!=|//|[-+*/%<>()=])
+  | (?P<separator>[;\n])
+  | (?P<skip>[ \t\r\f\v]+|\#[^\n]*)
+  | (?P<error>.)
+''', re.VERBOSE)
+
+# Binding power and function of each binary operator (higher binds tighter)
+_BINARY_OPERATORS = {
+    '<': (10, operator.lt), '<=': (10, operator.le),
+    '>': (10, operator.gt), '>=': (10, operator.ge),
+    '==': (10, operator.eq), '!=': (10, operator.ne),
+    '+': (20, operator.add), '-': (20, operator.sub),
+    '*': (30, operator.mul), '/': (30, operator.truediv),
+    '//': (30, operator.floordiv), '%': (30, operator.mod)
+}
+_UNARY_BINDING = 40
+
+_KEYWORDS = {'let', 'if', 'then', 'else'}
+
+# Binary operator functions by bytecode argument
+_OPERATOR_NAMES = tuple(_BINARY_OPERATORS)
+_OPERATOR_FUNCTIONS = tuple(function for _, function in _BINARY_OPERATORS.values())
+
+# Bytecode opcodes, each followed by one integer argument
+(_LOAD_CONST, _LOAD, _STORE, _RESULT, _BINARY, _ADD, _MULTIPLY, _NEGATE,
+ _JUMP_IF_FALSE, _JUMP, _FAIL) = range(11)
+
+# Types a variable binding may hold
+_NUMBER_TYPES = (int, float, bool)
+
+# Value of environment slots that were never assigned
+_UNSET = object()
+
+# Evaluation steps between wall-clock checks inside a statement
+_CLOCK_INTERVAL = 1024
+
+# NumPy ufunc of each binary operator, used by evaluate_columns
+_UFUNC_NAMES = {
+    '<': 'less', '<=': 'less_equal', '>': 'greater', '>=': 'greater_equal',
+    '==': 'equal', '!=': 'not_equal', '+': 'add', '-': 'subtract',
+    '*': 'multiply', '/': 'true_divide', '//': 'floor_divide', '%': 'remainder'
+}
+
+# Largest integer magnitude evaluate_columns computes in int64, and the
+# largest one that converts to float64 exactly
+_INT64_BOUND = 2 ** 62
+_FLOAT_EXACT_BOUND = 2 ** 53
+
+
+class _NotVectorizable(Exception):
+    """Raised while vectorizing a program that needs the scalar path"""
+
+
+class BudgetExceeded(ValueError):
+    """Raised when a program exceeds one of the interpreter's execution budgets"""
+    
+    MESSAGES = {
+        'source_length': 'Program too long: more than {} characters',
+        'steps': 'Program too large: more than {} evaluation steps',
+        'depth': 'Expression nested too deeply: more than {} levels',
+        'int_bits': 'Integer too large: more than {} bits',
+        'time': 'Time limit of {} seconds exceeded'
+    }
+    
+    def __init__(self, limit, maximum):
+        """
+        Args:
+            limit: Name of the exceeded budget (a key of MESSAGES)
+            maximum: Configured value of that budget
+        """
+        super().__init__(self.MESSAGES[limit].format(maximum))
+        self.limit = limit
+        self.maximum = maximum
+    
+    def to_dict(self):
+        return {'limit': self.limit, 'max': self.maximum}
 
 class MiniInterpreter:
     """
@@ -6,146 +98,900 @@ class MiniInterpreter:
     
     Evaluates let variable declarations and if conditions from input strings.
     Supports basic arithmetic and boolean operations.
+    
+    Programs are tokenized in a single pass and parsed with a Pratt parser
+    into tuple ASTs, with the usual precedence (comparisons, then + and -,
+    then *, /, // and %, then unary minus). Compiled programs are kept in
+    an LRU cache keyed by source text, so repeated programs skip parsing.
+    Bulk evaluation runs the programs as bytecode (see evaluate_many).
+    
+    Every run is bounded by budgets: source length, evaluation steps and
+    nesting depth are checked once per program before anything runs (the
+    language has no loops, so a run takes at most as many steps as the
+    program has AST nodes), integer size is checked by every addition
+    and multiplication, and an optional wall-clock limit before every
+    statement and binding and every 1024 evaluation steps within them.
     """
     
-    def __init__(self):
+    # Number of compiled programs kept in the cache
+    CACHE_SIZE = 256
+    
+    # Default execution budgets
+    MAX_SOURCE_LENGTH = 100000
+    MAX_STEPS = 100000
+    MAX_DEPTH = 500
+    MAX_INT_BITS = 4096
+    
+    _cache = OrderedDict()
+    
+    def __init__(self, max_steps=None, max_depth=None, max_int_bits=None,
+                 max_source_length=None, time_limit=None):
+        """
+        Args:
+            max_steps: Most AST nodes a program may evaluate
+            max_depth: Deepest nesting a program may contain (parsing and
+                evaluation recurse once per level, so keep it well below
+                sys.getrecursionlimit())
+            max_int_bits: Largest integer a multiplication may produce, in bits
+            max_source_length: Longest program text accepted, in characters
+            time_limit: Wall-clock seconds per evaluate/evaluate_many call
+                (None for no limit)
+        """
         self.variables = {}
         self.execution_steps = []
+        self.max_steps = max_steps or self.MAX_STEPS
+        self.max_depth = max_depth or self.MAX_DEPTH
+        self.max_int_bits = max_int_bits or self.MAX_INT_BITS
+        self.max_source_length = max_source_length or self.MAX_SOURCE_LENGTH
+        self.time_limit = time_limit
+        self._deadline = None
+        self._ticks = _CLOCK_INTERVAL
+        
+        # Operator functions with + and * checked against max_int_bits
+        self._operators = {op: function for op, (_, function) in _BINARY_OPERATORS.items()}
+        self._operators['+'] = partial(self._checked_arithmetic, '+')
+        self._operators['*'] = partial(self._checked_arithmetic, '*')
     
-    def evaluate(self, code):
+    def evaluate(self, code, trace=True):
         """
         Evaluate the given code string
         
         Args:
             code: String containing let declarations and if conditions
+            trace: Record execution steps (steps is None without it);
+                with LAZY they are only formatted when read
             
         Returns:
-            dict: Evaluation result with variables and execution steps
+            dict: Evaluation result with variables and execution steps, plus
+            'budget_exceeded' (limit name and maximum) if a budget ran out,
+            or None there if the code was refused for not being a string
         """
-        self.variables = {}
-        self.execution_steps = []
+        self._start_clock()
+        try:
+            program = self._checked_program(code)
+        except (BudgetExceeded, TypeError) as e:
+            return {
+                'result': f'Error: {str(e)}',
+                'variables': {},
+                'steps': [] if trace else None,
+                'budget_exceeded': e.to_dict() if isinstance(e, BudgetExceeded) else None
+            }
+        return self._run_statements(program, {}, trace)
+    
+    def evaluate_many(self, program, bindings, trace=False):
+        """
+        Evaluate one program against many variable bindings
+        
+        The program is compiled once to stack bytecode and run by a small
+        VM over a slot-indexed environment that is allocated once and
+        reset for every binding. Execution steps are only recorded when
+        tracing, which runs the tree-walking evaluator instead.
+        
+        Args:
+            program: Code string or compiled Program
+            bindings: Iterable of dicts mapping variable names to numbers
+                or booleans
+            trace: Also return the execution steps of every run (True or
+                LAZY, as in evaluate)
+            
+        Returns:
+            dict: 'results' with one result per binding ('Error: ...' for
+            failed runs), and 'steps' when traced
+            
+        Raises:
+            BudgetExceeded: If the program is over budget or time runs out
+            TypeError: If the program is neither a string nor a Program
+            ValueError: If a binding holds anything but a number or boolean
+        """
+        self._start_clock()
+        program = self._checked_program(program)
+        
+        if trace:
+            runs = []
+            for binding in bindings:
+                self._check_clock()
+                self._check_binding(binding)
+                run = self._run_statements(program, binding, trace)
+                if run.get('budget_exceeded', {}).get('limit') == 'time':
+                    raise BudgetExceeded('time', self.time_limit)
+                runs.append(run)
+            return {
+                'results': [run['result'] for run in runs],
+                'steps': [run['steps'] for run in runs]
+            }
+        
+        code, constants, names = program.bytecode
+        slots = {name: slot for slot, name in enumerate(names)}
+        unset = [_UNSET] * len(names)
+        env = list(unset)
+        results = []
+        for binding in bindings:
+            self._check_clock()
+            self._check_binding(binding)
+            env[:] = unset
+            for name, value in binding.items():
+                slot = slots.get(name)
+                if slot is not None:
+                    env[slot] = value
+            try:
+                results.append(self._run_bytecode(code, constants, names, env))
+            except BudgetExceeded as e:
+                if e.limit == 'time':
+                    raise
+                results.append(f'Error: {str(e)}')
+            except Exception as e:
+                results.append(f'Error: {str(e)}')
+        return {'results': results}
+    
+    def evaluate_columns(self, program, columns):
+        """
+        Evaluate a program over whole columns of variable values with NumPy
+        
+        Arithmetic and comparisons map to ufuncs and if/then/else to
+        np.where, so each operator runs once per column instead of once per
+        row. The vectorized result is only used when it matches row-by-row
+        evaluation: integer columns are range-checked so int64 cannot
+        overflow, and any division by zero in a row that would actually be
+        evaluated sends the program to the scalar path (evaluate_many),
+        as do undefined variables and statements that failed to parse.
+        Rows mixing int and float results are promoted to float; rows
+        mixing booleans and numbers are evaluated row by row, so booleans
+        stay booleans.
+        
+        Args:
+            program: Code string or compiled Program
+            columns: Dict mapping variable names to 1-D arrays (or lists) of
+                equal length, or to scalars shared by every row
+            
+        Returns:
+            dict: 'results' (array when vectorized, list from the scalar
+            path otherwise) and 'vectorized'
+        """
+        if np is None:
+            raise ImportError('evaluate_columns requires NumPy')
+        self._start_clock()
+        program = self._checked_program(program)
+        
+        arrays = {name: np.asarray(values) for name, values in columns.items()}
+        if any(values.ndim > 1 for values in arrays.values()):
+            raise ValueError('Columns must be one-dimensional')
+        lengths = {len(values) for values in arrays.values() if values.ndim == 1}
+        if len(lengths) > 1:
+            raise ValueError('Columns must have the same length')
+        rows = lengths.pop() if lengths else 1
+        
+        try:
+            results = self._evaluate_vectorized(program, arrays, rows)
+            return {'results': results, 'vectorized': True}
+        except _NotVectorizable:
+            pass
+        
+        bindings = (
+            {name: (values[i] if values.ndim else values).item() for name, values in arrays.items()}
+            for i in range(rows)
+        )
+        return {'results': self.evaluate_many(program, bindings)['results'], 'vectorized': False}
+    
+    def _evaluate_vectorized(self, program, arrays, rows):
+        """Run every statement over whole columns; raises _NotVectorizable"""
+        env, bounds = {}, {}
+        for name, values in arrays.items():
+            if values.dtype.kind == 'b':
+                env[name], bounds[name] = values, 1
+            elif values.dtype.kind in 'iu':
+                bound = int(np.abs(values).max(initial=0)) if values.dtype.kind == 'i' else int(values.max(initial=0))
+                if bound > _INT64_BOUND:
+                    raise _NotVectorizable()
+                env[name], bounds[name] = values.astype(np.int64), bound
+            elif values.dtype.kind == 'f':
+                env[name], bounds[name] = values.astype(np.float64), None
+            else:
+                raise _NotVectorizable()
+        
+        # Rows where an evaluated division had a zero divisor
+        failed = np.zeros(rows, dtype=bool)
+        result = None
+        with np.errstate(all='ignore'):
+            for statement in program.statements:
+                kind = statement[0]
+                if kind == 'error':
+                    raise _NotVectorizable()
+                node = statement[2] if kind == 'let' else statement[1]
+                result, bound = self._vector_node(node, env, bounds, True, failed)
+                if kind == 'let':
+                    env[statement[1]], bounds[statement[1]] = result, bound
+        
+        if result is None or failed.any():
+            raise _NotVectorizable()
+        return np.array(np.broadcast_to(result, (rows,)))
+    
+    def _vector_node(self, node, env, bounds, active, failed):
+        """
+        Evaluate an AST over columns
+        
+        Args:
+            node: AST node
+            env, bounds: Column (or scalar) of each variable and the largest
+                magnitude of its integer values (None for floats)
+            active: Bool mask of the rows where this node is evaluated
+            failed: Bool array marking rows that divide by zero
+            
+        Returns:
+            tuple: Value and its integer bound
+        """
+        kind = node[0]
+        if kind == 'const':
+            value = node[1]
+            return value, (abs(int(value)) if isinstance(value, int) else None)
+        if kind == 'var':
+            if node[1] not in env:
+                raise _NotVectorizable()
+            return env[node[1]], bounds[node[1]]
+        if kind == 'neg':
+            value, bound = self._vector_node(node[1], env, bounds, active, failed)
+            return np.negative(self._vector_number(value)), bound
+        if kind == 'if':
+            condition, _ = self._vector_node(node[1], env, bounds, active, failed)
+            condition = np.not_equal(condition, 0)
+            then_active, else_active = active & condition, active & ~condition
+            then_value, then_bound = self._vector_node(node[2], env, bounds, then_active, failed)
+            else_value, else_bound = self._vector_node(node[3], env, bounds, else_active, failed)
+            # A branch no active row takes is left out, so its type cannot
+            # leak into the other one through np.where
+            if not np.any(else_active):
+                return then_value, then_bound
+            if not np.any(then_active):
+                return else_value, else_bound
+            # np.where would turn booleans into numbers in rows where the
+            # other branch is a number, while the row path keeps them bool
+            if _is_bool(then_value) != _is_bool(else_value):
+                raise _NotVectorizable()
+            bound = None if then_bound is None or else_bound is None else max(then_bound, else_bound)
+            return np.where(condition, then_value, else_value), bound
+        
+        # Binary operators: walk left operands in a loop, as the tree walker does
+        spine = []
+        while node[0] == 'binop':
+            spine.append(node)
+            node = node[2]
+        value, bound = self._vector_node(node, env, bounds, active, failed)
+        for node in reversed(spine):
+            right, right_bound = self._vector_node(node[3], env, bounds, active, failed)
+            value, bound = self._vector_binop(node[1], value, bound, right, right_bound, active, failed)
+        return value, bound
+    
+    def _vector_binop(self, op, left, left_bound, right, right_bound, active, failed):
+        """Apply a binary operator to evaluated columns, returning value and integer bound"""
+        mixed = (left_bound is None) != (right_bound is None)
+        largest = max(left_bound or 0, right_bound or 0)
+        if (mixed or op == '/') and largest > _FLOAT_EXACT_BOUND:
+            raise _NotVectorizable()
+        
+        ufunc = getattr(np, _UFUNC_NAMES[op])
+        if _BINARY_OPERATORS[op][0] == 10:
+            return ufunc(left, right), 1
+        
+        if op in ('/', '//', '%'):
+            failed |= np.equal(right, 0) & active
+        value = ufunc(self._vector_number(left), self._vector_number(right))
+        
+        if op == '/' or left_bound is None or right_bound is None:
+            return value, None
+        bound = {
+            '+': left_bound + right_bound, '-': left_bound + right_bound,
+            '*': left_bound * right_bound, '//': left_bound, '%': right_bound
+        }[op]
+        if bound > _INT64_BOUND:
+            raise _NotVectorizable()
+        return value, bound
+    
+    def _vector_number(self, value):
+        """Booleans as integers, since NumPy treats + and - on bools logically"""
+        if isinstance(value, (bool, np.bool_)):
+            return int(value)
+        if isinstance(value, np.ndarray) and value.dtype == bool:
+            return value.astype(np.int64)
+        return value
+    
+    def _run_statements(self, program, variables, trace=True):
+        """Execute a compiled program with the tree walker, recording steps if tracing"""
+        self.variables = dict(variables)
+        self.execution_steps = [] if trace else None
         
         try:
-            # Split code into statements
-            statements = self._parse_statements(code)
             result = None
             
-            for statement in statements:
-                result = self._execute_statement(statement.strip())
+            for statement in program.statements:
+                self._check_clock()
+                result = self._execute_statement(statement)
             
             return {
                 'result': result,
                 'variables': dict(self.variables),
-                'steps': list(self.execution_steps)
+                'steps': lazy_trace(trace, _format_steps, self.execution_steps)
             }
         
         except Exception as e:
-            return {
+            result = {
                 'result': f'Error: {str(e)}',
                 'variables': dict(self.variables),
-                'steps': list(self.execution_steps)
+                'steps': lazy_trace(trace, _format_steps, self.execution_steps)
             }
+            if isinstance(e, BudgetExceeded):
+                result['budget_exceeded'] = e.to_dict()
+            return result
     
-    def _parse_statements(self, code):
-        """Parse code into individual statements"""
-        # Remove comments and extra whitespace
-        code = re.sub(r'#.*', '', code)  # Remove comments
-        code = re.sub(r'\s+', ' ', code.strip())  # Normalize whitespace
+    def _checked_program(self, program):
+        """Compile a code string if needed and check it against the static budgets"""
+        if not isinstance(program, Program):
+            if not isinstance(program, str):
+                raise TypeError(f'Code must be a string, not {type(program).__name__}')
+            if len(program) > self.max_source_length:
+                raise BudgetExceeded('source_length', self.max_source_length)
+            program = self.compile(program, self.max_depth)
+        if program.size > self.max_steps:
+            raise BudgetExceeded('steps', self.max_steps)
+        if program.depth > self.max_depth:
+            raise BudgetExceeded('depth', self.max_depth)
+        return program
+    
+    def _start_clock(self):
+        self._deadline = None if self.time_limit is None else time.monotonic() + self.time_limit
+        self._ticks = _CLOCK_INTERVAL
+    
+    def _check_clock(self):
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise BudgetExceeded('time', self.time_limit)
+    
+    def _checked_arithmetic(self, op, left, right):
+        """
+        Add or multiply, refusing results over the size budget
         
-        # Split by semicolons or newlines
-        statements = re.split(r'[;\n]', code)
-        return [stmt.strip() for stmt in statements if stmt.strip()]
+        Operands are checked before computing, so a string or list can
+        never be repeated or concatenated. For integers checking the result
+        is enough: both operands were within budget, so it is at most
+        about twice as wide.
+        """
+        if type(left) not in _NUMBER_TYPES or type(right) not in _NUMBER_TYPES:
+            raise ValueError(f'Unsupported operand types for {op}: '
+                             f'{type(left).__name__} and {type(right).__name__}')
+        value = _BINARY_OPERATORS[op][1](left, right)
+        if type(value) is int and value.bit_length() > self.max_int_bits:
+            raise BudgetExceeded('int_bits', self.max_int_bits)
+        return value
+    
+    def _check_binding(self, binding):
+        """Refuse variable bindings holding anything but numbers and booleans"""
+        for name, value in binding.items():
+            if type(value) not in _NUMBER_TYPES:
+                raise ValueError(f'Unsupported value for {name}: {type(value).__name__}')
+    
+    @classmethod
+    def compile(cls, code, max_depth=None):
+        """
+        Get the compiled program for a code string, using the cache
+        
+        Args:
+            code: String containing let declarations and if conditions
+            max_depth: Deepest nesting the parser accepts (MAX_DEPTH by default)
+            
+        Returns:
+            Program: Compiled program
+            
+        Raises:
+            BudgetExceeded: If the code nests deeper than max_depth
+        """
+        key = (code, max_depth or cls.MAX_DEPTH)
+        program = cls._cache.get(key)
+        if program is None:
+            program = Program(code, key[1])
+            cls._cache[key] = program
+            if len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        else:
+            cls._cache.move_to_end(key)
+        return program
     
     def _execute_statement(self, statement):
-        """Execute a single statement"""
+        """Execute a single compiled statement, recording its raw step"""
+        kind = statement[0]
+        steps = self.execution_steps
+        
         # Let declaration: let x = expression
-        let_match = re.match(r'let\s+(\w+)\s*=\s*(.+)', statement)
-        if let_match:
-            var_name = let_match.group(1)
-            expression = let_match.group(2)
-            value = self._evaluate_expression(expression)
+        if kind == 'let':
+            _, var_name, node, expression = statement
+            value = self._evaluate_node(node)
             self.variables[var_name] = value
-            self.execution_steps.append(f'let {var_name} = {expression} → {value}')
+            if steps is not None:
+                steps.append(('let', var_name, expression, value))
             return value
         
         # If condition: if (condition) then expression else expression
-        if_match = re.match(r'if\s*\(([^)]+)\)\s*then\s+(.+?)\s+else\s+(.+)', statement)
-        if if_match:
-            condition = if_match.group(1)
-            then_expr = if_match.group(2)
-            else_expr = if_match.group(3)
-            
-            condition_result = self._evaluate_expression(condition)
-            if condition_result:
-                result = self._evaluate_expression(then_expr)
-                self.execution_steps.append(f'if ({condition}) → True, result: {result}')
+        if kind == 'if':
+            _, (_, condition_node, then_node, else_node), condition = statement
+            if self._evaluate_node(condition_node):
+                taken, result = True, self._evaluate_node(then_node)
             else:
-                result = self._evaluate_expression(else_expr)
-                self.execution_steps.append(f'if ({condition}) → False, result: {result}')
-            
+                taken, result = False, self._evaluate_node(else_node)
+            if steps is not None:
+                steps.append(('if', condition, taken, result))
             return result
         
+        # Statement that failed to parse, reported when reached
+        if kind == 'error':
+            raise ValueError(statement[1])
+        
         # Simple expression evaluation
-        result = self._evaluate_expression(statement)
-        self.execution_steps.append(f'{statement} → {result}')
+        _, node, expression = statement
+        result = self._evaluate_node(node)
+        if steps is not None:
+            steps.append(('expr', expression, result))
         return result
     
-    def _evaluate_expression(self, expression):
-        """Evaluate a mathematical or boolean expression"""
-        expression = expression.strip()
+    def _run_bytecode(self, code, constants, names, env):
+        """Stack machine loop; returns the value of the last statement"""
+        stack = []
+        push, pop = stack.append, stack.pop
+        max_int_bits = self.max_int_bits
+        result = None
+        pc, end = 0, len(code)
+        # Code has no backward jumps, so pc alone tells when to check the clock
+        check_at = end if self._deadline is None else 2 * _CLOCK_INTERVAL
+        while pc < end:
+            if pc >= check_at:
+                self._check_clock()
+                check_at = pc + 2 * _CLOCK_INTERVAL
+            op, arg = code[pc], code[pc + 1]
+            pc += 2
+            if op == _LOAD:
+                value = env[arg]
+                if value is _UNSET:
+                    raise ValueError(f'Undefined variable: {names[arg]}')
+                push(value)
+            elif op == _LOAD_CONST:
+                push(constants[arg])
+            elif op == _BINARY:
+                right = pop()
+                stack[-1] = _OPERATOR_FUNCTIONS[arg](stack[-1], right)
+            elif op == _MULTIPLY or op == _ADD:
+                right = pop()
+                left = stack[-1]
+                if type(left) is int and type(right) is int:
+                    value = left * right if op == _MULTIPLY else left + right
+                    if value.bit_length() > max_int_bits:
+                        raise BudgetExceeded('int_bits', max_int_bits)
+                    stack[-1] = value
+                else:
+                    stack[-1] = self._checked_arithmetic('*' if op == _MULTIPLY else '+', left, right)
+            elif op == _JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == _JUMP:
+                pc = arg
+            elif op == _NEGATE:
+                stack[-1] = -stack[-1]
+            elif op == _STORE:
+                result = env[arg] = pop()
+            elif op == _RESULT:
+                result = pop()
+            else:
+                raise ValueError(constants[arg])
+        return result
+    
+    def _evaluate_node(self, node):
+        """Evaluate an expression AST by walking the tree"""
+        kind = node[0]
+        if kind == 'const':
+            return node[1]
+        if kind == 'var':
+            try:
+                return self.variables[node[1]]
+            except KeyError:
+                raise ValueError(f'Undefined variable: {node[1]}') from None
+        if kind == 'binop':
+            # Left operands are walked in a loop, so long chains like
+            # a + b + c + ... do not recurse
+            spine = []
+            while node[0] == 'binop':
+                spine.append(node)
+                node = node[2]
+            value = self._evaluate_node(node)
+            for node in reversed(spine):
+                self._ticks -= 1
+                if not self._ticks:
+                    self._ticks = _CLOCK_INTERVAL
+                    self._check_clock()
+                value = self._operators[node[1]](value, self._evaluate_node(node[3]))
+            return value
+        if kind == 'neg':
+            return -self._evaluate_node(node[1])
+        # kind == 'if'
+        if self._evaluate_node(node[1]):
+            return self._evaluate_node(node[2])
+        return self._evaluate_node(node[3])
+
+
+def _format_step(step):
+    """Readable form of one raw execution step"""
+    kind = step[0]
+    if kind == 'let':
+        _, var_name, expression, value = step
+        return f'let {var_name} = {expression} → {value}'
+    if kind == 'if':
+        _, condition, taken, result = step
+        return f'if ({condition}) → {taken}, result: {result}'
+    _, expression, result = step
+    return f'{expression} → {result}'
+
+
+def _format_steps(steps):
+    """Readable execution steps of one run"""
+    return [_format_step(step) for step in steps]
+
+
+class Program:
+    """
+    Compiled MiniInterpreter program
+    
+    statements holds one tuple per statement:
+        ('let', name, ast, expression_text)
+        ('if', if_ast, condition_text)
+        ('expr', ast, expression_text)
+        ('error', message) for statements that failed to parse
+    
+    AST nodes are tuples: ('const', value), ('var', name), ('neg', operand),
+    ('binop', op, left, right) and ('if', condition, then, else). size is
+    the total number of AST nodes and depth the deepest nesting the parser
+    recursed into. Left-associative chains such as a + b + c are parsed
+    and evaluated in loops, so they do not add depth.
+    """
+    
+    def __init__(self, source, max_depth=None):
+        """
+        Args:
+            source: Program text
+            max_depth: Deepest nesting accepted (MiniInterpreter.MAX_DEPTH
+                by default)
+            
+        Raises:
+            BudgetExceeded: If a statement nests deeper than max_depth
+        """
+        self.source = source
+        max_depth = max_depth or MiniInterpreter.MAX_DEPTH
+        self.statements = []
+        self.depth = 0
+        for tokens in _split_statements(source):
+            if isinstance(tokens, str):
+                self.statements.append(('error', tokens))
+                continue
+            parser = _Parser(source, tokens, max_depth)
+            self.statements.append(parser.parse_statement())
+            self.depth = max(self.depth, parser.deepest)
+        self._bytecode = None
+        
+        # Counted without recursion, since left-associative chains are long
+        self.size = 0
+        stack = [statement[2] if statement[0] == 'let' else statement[1]
+                 for statement in self.statements if statement[0] != 'error']
+        while stack:
+            node = stack.pop()
+            self.size += 1
+            for child in node[1:]:
+                if type(child) is tuple:
+                    stack.append(child)
+    
+    @property
+    def bytecode(self):
+        """
+        Stack bytecode of the program, compiled on first use
+        
+        Returns:
+            tuple: Flat list of (opcode, argument) integer pairs, the
+            constant pool and the variable name of every environment slot
+        """
+        if self._bytecode is None:
+            self._bytecode = self._compile_bytecode()
+        return self._bytecode
+    
+    def _compile_bytecode(self):
+        """Emit bytecode for every statement in order"""
+        code = []
+        constants = []
+        slots = {}
         
-        # Handle boolean literals
-        if expression.lower() == 'true':
-            return True
-        if expression.lower() == 'false':
-            return False
+        def constant(value):
+            constants.append(value)
+            return len(constants) - 1
         
-        # Handle numeric literals
-        if re.match(r'^-?\d+$', expression):
-            return int(expression)
+        def emit(node):
+            kind = node[0]
+            if kind == 'const':
+                code.extend((_LOAD_CONST, constant(node[1])))
+            elif kind == 'var':
+                code.extend((_LOAD, slots.setdefault(node[1], len(slots))))
+            elif kind == 'binop':
+                spine = []
+                while node[0] == 'binop':
+                    spine.append(node)
+                    node = node[2]
+                emit(node)
+                for node in reversed(spine):
+                    emit(node[3])
+                    if node[1] == '*':
+                        code.extend((_MULTIPLY, 0))
+                    elif node[1] == '+':
+                        code.extend((_ADD, 0))
+                    else:
+                        code.extend((_BINARY, _OPERATOR_NAMES.index(node[1])))
+            elif kind == 'neg':
+                emit(node[1])
+                code.extend((_NEGATE, 0))
+            else:
+                emit(node[1])
+                code.extend((_JUMP_IF_FALSE, 0))
+                to_else = len(code) - 1
+                emit(node[2])
+                code.extend((_JUMP, 0))
+                to_end = len(code) - 1
+                code[to_else] = len(code)
+                emit(node[3])
+                code[to_end] = len(code)
         
-        # Handle variable references
-        if re.match(r'^\w+$', expression):
-            if expression in self.variables:
-                return self.variables[expression]
+        for statement in self.statements:
+            kind = statement[0]
+            if kind == 'let':
+                emit(statement[2])
+                code.extend((_STORE, slots.setdefault(statement[1], len(slots))))
+            elif kind == 'error':
+                code.extend((_FAIL, constant(statement[1])))
             else:
-                raise ValueError(f'Undefined variable: {expression}')
-        
-        # Handle comparison operations
-        comparison_ops = [('<=', lambda x, y: x <= y), ('>=', lambda x, y: x >= y),
-                         ('<', lambda x, y: x < y), ('>', lambda x, y: x > y),
-                         ('==', lambda x, y: x == y), ('!=', lambda x, y: x != y)]
-        
-        for op, func in comparison_ops:
-            if op in expression:
-                parts = expression.split(op, 1)
-                if len(parts) == 2:
-                    left = self._evaluate_expression(parts[0].strip())
-                    right = self._evaluate_expression(parts[1].strip())
-                    return func(left, right)
-        
-        # Handle arithmetic operations (order matters for precedence)
-        arithmetic_ops = [
-            ('+', lambda x, y: x + y),
-            ('-', lambda x, y: x - y),
-            ('*', lambda x, y: x * y),
-            ('//', lambda x, y: x // y),
-            ('/', lambda x, y: x / y),
-            ('%', lambda x, y: x % y)
-        ]
-        
-        # Simple left-to-right evaluation (no proper precedence for simplicity)
-        for op, func in arithmetic_ops:
-            if op in expression:
-                parts = expression.split(op, 1)
-                if len(parts) == 2:
-                    left = self._evaluate_expression(parts[0].strip())
-                    right = self._evaluate_expression(parts[1].strip())
-                    return func(left, right)
-        
-        # Handle parentheses (simple case)
-        paren_match = re.match(r'^\((.+)\)$', expression)
-        if paren_match:
-            return self._evaluate_expression(paren_match.group(1))
-        
-        raise ValueError(f'Cannot evaluate expression: {expression}')
\ No newline at end of file
+                emit(statement[1])
+                code.extend((_RESULT, 0))
+        
+        return code, constants, list(slots)
+
+
+def _is_bool(value):
+    """Whether a vectorized value (column or scalar) holds booleans"""
+    return isinstance(value, (bool, np.bool_)) or (isinstance(value, np.ndarray) and value.dtype == bool)
+
+
+def _split_statements(source):
+    """
+    Tokenize source in one pass and split it into statements
+    
+    ; always ends a statement. A newline only ends one that is complete:
+    not inside parentheses, not after an operator or keyword, and not
+    when the next token is then or else, so an if expression can span
+    lines.
+    
+    Returns:
+        list: Per statement, its (kind, value, start, end) tokens, or an
+        error message if it contains an unexpected character
+    """
+    statements = []
+    tokens = []
+    error = None
+    depth = 0
+    newline = False  # a newline followed a complete statement
+    for match in _TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'skip':
+            continue
+        if kind == 'separator' and value == '\n':
+            newline = newline or (depth <= 0 and _ends_statement(tokens))
+            continue
+        if (newline and not (kind == 'name' and value in ('then', 'else'))) or kind == 'separator':
+            if error or tokens:
+                statements.append(error or tokens)
+            tokens, error, depth = [], None, 0
+        newline = False
+        if kind == 'separator':
+            continue
+        if kind == 'error' and error is None:
+            error = f'Unexpected character: {value}'
+        elif kind == 'op' and value in ('(', ')'):
+            depth += 1 if value == '(' else -1
+        tokens.append((kind, value, match.start(), match.end()))
+    if error or tokens:
+        statements.append(error or tokens)
+    return statements
+
+
+def _ends_statement(tokens):
+    """Whether a statement may end after these tokens"""
+    if not tokens:
+        return False
+    kind, value = tokens[-1][:2]
+    if kind == 'op':
+        return value == ')'
+    return not (kind == 'name' and value in _KEYWORDS)
+
+
+class _Parser:
+    """Pratt parser for the tokens of one statement"""
+    
+    def __init__(self, source, tokens, max_depth):
+        self.source = source
+        self.tokens = tokens
+        self.pos = 0
+        self.max_depth = max_depth
+        self.nesting = 0
+        self.deepest = 0
+        end = tokens[-1][3]
+        self.end = ('end', 'end of statement', end, end)
+    
+    def parse_statement(self):
+        """Parse the whole statement, or return an ('error', message) statement"""
+        try:
+            first = self._peek()
+            if first[:2] == ('name', 'let'):
+                self._next()
+                name = self._expect('name')
+                if name in _KEYWORDS:
+                    raise ValueError(f'Unexpected token: {name}')
+                self._expect('op', '=')
+                node, text = self._expression_with_text()
+                statement = ('let', name, node, text)
+            elif first[:2] == ('name', 'if'):
+                # The else branch extends to the end, so the if is the whole statement
+                self._next()
+                node, condition = self._if_expression()
+                statement = ('if', node, condition)
+            else:
+                node, text = self._expression_with_text()
+                statement = ('expr', node, text)
+            
+            token = self._peek()
+            if token is not self.end:
+                raise ValueError(f'Unexpected token: {token[1]}')
+            return statement
+        except BudgetExceeded:
+            raise
+        except ValueError as e:
+            return ('error', str(e))
+    
+    def _expression_with_text(self):
+        """Parse an expression and return it with its whitespace-normalized source text"""
+        start = self._peek()[2]
+        node = self._expression(0)
+        end = self.tokens[self.pos - 1][3]
+        return node, ' '.join(self.source[start:end].split())
+    
+    def _enter(self):
+        """
+        Count one more level of parser recursion against max_depth
+        
+        Every recursive parsing method calls this, so the Python stack used
+        by parsing, and by evaluating the resulting AST, stays bounded by
+        max_depth.
+        """
+        self.nesting += 1
+        if self.nesting > self.max_depth:
+            raise BudgetExceeded('depth', self.max_depth)
+        self.deepest = max(self.deepest, self.nesting)
+    
+    def _expression(self, right_binding):
+        """Parse an expression whose operators bind tighter than right_binding"""
+        self._enter()
+        left = self._prefix(self._next())
+        while True:
+            kind, value, _, _ = self._peek()
+            if kind != 'op' or value not in _BINARY_OPERATORS:
+                break
+            binding = _BINARY_OPERATORS[value][0]
+            if binding <= right_binding:
+                break
+            self._next()
+            left = ('binop', value, left, self._expression(binding))
+        self.nesting -= 1
+        return left
+    
+    def _prefix(self, token):
+        """Parse the expression starting with token"""
+        kind, value, _, _ = token
+        if kind == 'number':
+            return ('const', int(value))
+        if kind == 'name':
+            if value.lower() == 'true':
+                return ('const', True)
+            if value.lower() == 'false':
+                return ('const', False)
+            if value == 'if':
+                self._enter()
+                node = self._if_expression()[0]
+                self.nesting -= 1
+                return node
+            if value in _KEYWORDS:
+                raise ValueError(f'Unexpected token: {value}')
+            return ('var', value)
+        if value == '(':
+            self._enter()
+            node = self._expression(0)
+            self._expect('op', ')')
+            self.nesting -= 1
+            return node
+        if value == '-':
+            self._enter()
+            operand = self._expression(_UNARY_BINDING)
+            self.nesting -= 1
+            if operand[0] == 'const':
+                return ('const', -operand[1])
+            return ('neg', operand)
+        raise ValueError(f'Unexpected token: {value}')
+    
+    def _if_expression(self):
+        """
+        Parse the rest of: if (condition) then expression else expression
+        
+        Returns:
+            tuple: The if AST and the condition text without its enclosing
+            parentheses, as shown in execution steps
+        """
+        self._enter()
+        first = self.pos
+        condition = self._expression(0)
+        last = self.pos - 1
+        
+        start, end = self.tokens[first][2], self.tokens[last][3]
+        if self.tokens[first][1] == '(' and self._closing_paren(first) == last:
+            start, end = self.tokens[first][3], self.tokens[last][2]
+        condition_text = ' '.join(self.source[start:end].split())
+        
+        self._expect('name', 'then')
+        then_node = self._expression(0)
+        self._expect('name', 'else')
+        else_node = self._expression(0)
+        self.nesting -= 1
+        return ('if', condition, then_node, else_node), condition_text
+    
+    def _closing_paren(self, index):
+        """Index of the token closing the parenthesis at index"""
+        depth = 0
+        for i in range(index, len(self.tokens)):
+            value = self.tokens[i][1]
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                depth -= 1
+                if depth == 0:
+                    return i
+        return None
+    
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else self.end
+    
+    def _next(self):
+        token = self._peek()
+        if token is self.end:
+            raise ValueError('Unexpected end of statement')
+        self.pos += 1
+        return token
+    
+    def _expect(self, kind, value=None):
+        token = self._peek()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise ValueError(f'Expected {value or kind}, got {token[1]}')
+        self.pos += 1
+        return token[1]
@@ -0,0 +1,184 @@
+from .sudoku_validator import SudokuValidator, ZoneLayout
+from .tracing import lazy_trace
+
+# Candidate sets are 9-bit masks: bit d - 1 stands for digit d
+ALL_DIGITS = 0x1FF
+BIT_COUNT = [bin(mask).count('1') for mask in range(ALL_DIGITS + 1)]
+BIT_DIGIT = {1 << (digit - 1): digit for digit in range(1, 10)}
+
+class SudokuSolver:
+    """
+    Sudoku Solver with Custom Zones
+    
+    Constraint-propagating solver built on the unit definitions of
+    SudokuValidator: the 27 standard units plus the compiled custom zones
+    of a ZoneLayout. Candidates are tracked as bitsets, naked and hidden
+    singles are propagated to a fixed point, and the search branches on
+    the cell with the fewest candidates (MRV).
+    """
+    
+    def __init__(self):
+        self.validator = SudokuValidator()
+    
+    def solve(self, board, custom_zones=(), limit=2, trace=True):
+        """
+        Solve a board and count its solutions
+        
+        Args:
+            board: 9x9 matrix with integers 0-9 (0 represents empty cell)
+            custom_zones: List of zones or a compiled ZoneLayout
+            limit: Stop counting after this many solutions (2 is enough
+                to tell whether the solution is unique)
+            trace: Include the validator's per-unit details of the input
+                board (True, LAZY, or False for None)
+            
+        Returns:
+            dict: solution_count (capped at limit), unique (None when a
+            solution was found with limit below 2, so uniqueness was not
+            checked), the first solution found (or None), and validation
+            errors and details of the input
+        """
+        layout = ZoneLayout.compile(custom_zones)
+        if not self.validator.is_valid(board, layout):
+            result = self.validator.validate_with_custom_zones(board, layout, trace)
+            return {
+                'solution_count': 0,
+                'unique': False,
+                'solution': None,
+                'errors': result['errors'],
+                'details': result['details']
+            }
+        
+        solutions = []
+        state = self._initial_state(board, layout)
+        if state is not None:
+            self._search(state, layout, limit, solutions)
+        
+        return {
+            'solution_count': len(solutions),
+            'unique': len(solutions) == 1 if limit >= 2 or not solutions else None,
+            'solution': self._to_board(solutions[0]) if solutions else None,
+            'errors': [],
+            'details': lazy_trace(trace, self._validation_details, board, layout)
+        }
+    
+    def candidates(self, board, custom_zones=()):
+        """
+        Candidate digits of every cell after singles propagation
+        
+        Args:
+            board: 9x9 matrix with integers 0-9 (0 represents empty cell)
+            custom_zones: List of zones or a compiled ZoneLayout
+            
+        Returns:
+            list: 9x9 matrix of candidate digit lists, or None if the board
+            is contradictory
+        """
+        layout = ZoneLayout.compile(custom_zones)
+        if not self.validator.is_valid(board, layout):
+            return None
+        state = self._initial_state(board, layout)
+        if state is None:
+            return None
+        return [
+            [[digit for digit in range(1, 10) if state[r * 9 + c] & (1 << (digit - 1))]
+             for c in range(9)]
+            for r in range(9)
+        ]
+    
+    def _validation_details(self, board, layout):
+        """Per-unit validation details of a board"""
+        return self.validator.validate_with_custom_zones(board, layout)['details']
+    
+    def _initial_state(self, board, layout):
+        """Candidate masks for a board after propagating its givens"""
+        state = [ALL_DIGITS] * 81
+        givens = [(r * 9 + c, 1 << (value - 1))
+                  for r, row in enumerate(board) for c, value in enumerate(row) if value]
+        if not self._propagate(state, givens, layout):
+            return None
+        return state
+    
+    def _propagate(self, state, assignments, layout):
+        """
+        Apply assignments and propagate singles until nothing changes
+        
+        Args:
+            state: List of 81 candidate masks, updated in place
+            assignments: List of (cell, bit) to place
+            layout: ZoneLayout providing units and peers
+            
+        Returns:
+            bool: False if a contradiction was found
+        """
+        peers = layout.peers
+        units = layout.units
+        placed = [False] * 81
+        for cell in range(81):
+            placed[cell] = BIT_COUNT[state[cell]] == 1
+        
+        while assignments:
+            # Naked singles: eliminate each placed digit from the cell's peers
+            while assignments:
+                cell, bit = assignments.pop()
+                if not state[cell] & bit:
+                    return False
+                state[cell] = bit
+                for peer in peers[cell]:
+                    mask = state[peer]
+                    if mask & bit:
+                        mask &= ~bit
+                        if not mask:
+                            return False
+                        state[peer] = mask
+                        if BIT_COUNT[mask] == 1:
+                            assignments.append((peer, mask))
+                placed[cell] = True
+            
+            # Hidden singles: a digit with a single place left in a unit
+            for unit in units:
+                once = twice = 0
+                for cell in unit:
+                    mask = state[cell]
+                    twice |= once & mask
+                    once |= mask
+                if once != ALL_DIGITS:
+                    return False
+                only = once & ~twice
+                if not only:
+                    continue
+                for cell in unit:
+                    bit = state[cell] & only
+                    if bit and not placed[cell]:
+                        if BIT_COUNT[bit] > 1:
+                            return False
+                        assignments.append((cell, bit))
+                        placed[cell] = True
+        
+        return True
+    
+    def _search(self, state, layout, limit, solutions):
+        """Depth-first search on the cell with the fewest candidates"""
+        best, best_count = -1, 10
+        for cell in range(81):
+            count = BIT_COUNT[state[cell]]
+            if 1 < count < best_count:
+                best, best_count = cell, count
+                if count == 2:
+                    break
+        
+        if best == -1:
+            solutions.append(state)
+            return
+        
+        mask = state[best]
+        while mask and len(solutions) < limit:
+            bit = mask & -mask
+            mask ^= bit
+            branch = list(state)
+            if self._propagate(branch, [(best, bit)], layout):
+                self._search(branch, layout, limit, solutions)
+    
+    def _to_board(self, state):
+        """Convert solved candidate masks back to a 9x9 matrix"""
+        return [[BIT_DIGIT[state[r * 9 + c]] for c in range(9)] for r in range(9)]
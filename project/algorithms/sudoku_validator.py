@@ -1,3 +1,21 @@
+import hashlib
+import json
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only validate_array needs it
+    np = None
+
+# Flat cell indices (row * 9 + col) of the 27 standard units: rows, columns, 3x3 boxes
+STANDARD_UNITS = tuple(
+    [tuple(row * 9 + col for col in range(9)) for row in range(9)] +
+    [tuple(row * 9 + col for row in range(9)) for col in range(9)] +
+    [tuple((box_row * 3 + r) * 9 + box_col * 3 + c for r in range(3) for c in range(3))
+     for box_row in range(3) for box_col in range(3)]
+)
+
 class SudokuValidator:
     """
     Sudoku Validator with Custom Zones
@@ -6,17 +24,30 @@ class SudokuValidator:
     Each custom zone must contain digits 1-9 without repetition.
     """
     
+    # Failure code bits reported by validate_array
+    FAIL_FORMAT = 1
+    FAIL_ROWS = 2
+    FAIL_COLUMNS = 4
+    FAIL_BOXES = 8
+    FAIL_ZONES = 16
+    
+    # Boards validated per vectorized chunk in validate_array
+    ARRAY_CHUNK_SIZE = 65536
+    
     def __init__(self):
         self.board_size = 9
         self.valid_digits = set(range(1, 10))
     
-    def validate_with_custom_zones(self, board, custom_zones):
+    def validate_with_custom_zones(self, board, custom_zones, trace=True):
         """
         Validate Sudoku board with custom zones
         
         Args:
             board: 9x9 matrix with integers 0-9 (0 represents empty cell)
-            custom_zones: List of zones, each zone is a list of (row, col) coordinates
+            custom_zones: List of zones, each zone is a list of (row, col)
+                coordinates, or a compiled ZoneLayout
+            trace: Include the per-unit details (None without it, in which
+                case a valid board only takes the is_valid pass)
             
         Returns:
             dict: Validation result with details
@@ -25,7 +56,14 @@ class SudokuValidator:
             return {
                 'valid': False,
                 'errors': ['Invalid board format'],
-                'details': 'Board must be 9x9 matrix with integers 0-9'
+                'details': 'Board must be 9x9 matrix with integers 0-9' if trace else None
+            }
+        
+        if not trace and self.is_valid(board, custom_zones):
+            return {
+                'valid': True,
+                'errors': [],
+                'details': None
             }
         
         errors = []
@@ -44,9 +82,132 @@ class SudokuValidator:
         return {
             'valid': len(errors) == 0,
             'errors': errors,
-            'details': details
+            'details': details if trace else None
         }
     
+    def is_valid(self, board, custom_zones=()):
+        """
+        Fast pass/fail validation
+        
+        Checks the same rules as validate_with_custom_zones in one pass over
+        the 81 cells, keeping a 9-bit mask of seen digits per row, column,
+        box and custom zone, and without building any error messages.
+        
+        Args:
+            board: 9x9 matrix with integers 0-9 (0 represents empty cell)
+            custom_zones: List of zones or a compiled ZoneLayout
+            
+        Returns:
+            bool: True if the board is valid
+        """
+        layout = ZoneLayout.compile(custom_zones)
+        if not layout.valid:
+            return False
+        return self._is_valid_compiled(board, layout)
+    
+    def validate_many(self, boards, custom_zones=()):
+        """
+        Fast pass/fail validation of many boards sharing the same custom zones
+        
+        Args:
+            boards: Iterable of 9x9 boards
+            custom_zones: List of zones or a compiled ZoneLayout applied to every board
+            
+        Returns:
+            list: One bool per board
+        """
+        layout = ZoneLayout.compile(custom_zones)
+        if not layout.valid:
+            return [False for _ in boards]
+        return [self._is_valid_compiled(board, layout) for board in boards]
+    
+    def validate_array(self, boards, custom_zones=()):
+        """
+        Vectorized validation of a corpus of boards with NumPy
+        
+        Boards are processed in chunks of ARRAY_CHUNK_SIZE. For every unit
+        the digits are turned into bits (1 << value, with empty cells
+        contributing nothing) and a unit has a duplicate exactly when the
+        sum of its bits differs from their bitwise OR.
+        
+        Args:
+            boards: Array of shape (N, 9, 9) with values 0-9, or the path of
+                a .npy file holding one (memory-mapped, not loaded)
+            custom_zones: List of zones or a compiled ZoneLayout applied to every board
+            
+        Returns:
+            dict: 'valid' bool array of shape (N,) and 'failure_codes' uint8
+            array of FAIL_* bits per board
+        """
+        if np is None:
+            raise ImportError('validate_array requires NumPy')
+        if isinstance(boards, str):
+            boards = np.load(boards, mmap_mode='r')
+        boards = np.asarray(boards)
+        if boards.ndim != 3 or boards.shape[1:] != (9, 9):
+            raise ValueError('boards must have shape (N, 9, 9)')
+        
+        units = [
+            (self.FAIL_ROWS, np.arange(81).reshape(9, 9)),
+            (self.FAIL_COLUMNS, np.arange(81).reshape(9, 9).T),
+            (self.FAIL_BOXES, np.arange(81).reshape(3, 3, 3, 3).transpose(0, 2, 1, 3).reshape(9, 9))
+        ]
+        layout = ZoneLayout.compile(custom_zones)
+        if layout.valid and layout.zone_cells:
+            units.append((self.FAIL_ZONES, np.array(layout.zone_cells)))
+        
+        codes = np.zeros(len(boards), dtype=np.uint8)
+        if not layout.valid:
+            codes |= self.FAIL_ZONES
+        
+        for start in range(0, len(boards), self.ARRAY_CHUNK_SIZE):
+            chunk = np.asarray(boards[start:start + self.ARRAY_CHUNK_SIZE]).reshape(-1, 81)
+            out_of_range = (chunk < 0) | (chunk > 9)
+            values = np.where(out_of_range, 0, chunk).astype(np.uint16)
+            bits = np.left_shift(np.uint16(1), values) & np.uint16(0x3FE)
+            
+            chunk_codes = codes[start:start + len(chunk)]
+            chunk_codes[out_of_range.any(axis=1)] |= self.FAIL_FORMAT
+            for code, cells in units:
+                unit_bits = bits[:, cells]
+                duplicate = (unit_bits.sum(axis=2, dtype=np.uint16) !=
+                             np.bitwise_or.reduce(unit_bits, axis=2)).any(axis=1)
+                chunk_codes[duplicate] |= code
+        
+        return {
+            'valid': codes == 0,
+            'failure_codes': codes
+        }
+    
+    def _is_valid_compiled(self, board, layout):
+        """Single pass over the board with per-unit bit masks"""
+        if not self._validate_board_format(board):
+            return False
+        
+        row_masks = [0] * 9
+        col_masks = [0] * 9
+        box_masks = [0] * 9
+        zone_masks = [0] * len(layout.zone_cells)
+        cell_zones = layout.cell_zones
+        
+        for r, row in enumerate(board):
+            for c, value in enumerate(row):
+                if value == 0:
+                    continue
+                bit = 1 << value
+                b = (r // 3) * 3 + c // 3
+                if (row_masks[r] | col_masks[c] | box_masks[b]) & bit:
+                    return False
+                row_masks[r] |= bit
+                col_masks[c] |= bit
+                box_masks[b] |= bit
+                for z in cell_zones[r * 9 + c]:
+                    if zone_masks[z] & bit:
+                        return False
+                    zone_masks[z] |= bit
+        
+        return True
+    
     def _validate_board_format(self, board):
         """Check if board has correct format"""
         if not isinstance(board, list) or len(board) != 9:
@@ -105,21 +266,18 @@ class SudokuValidator:
     
     def _validate_custom_zones(self, board, custom_zones):
         """Validate custom zones"""
+        layout = ZoneLayout.compile(custom_zones)
         errors = []
         zone_details = []
         
-        for i, zone in enumerate(custom_zones):
-            if len(zone) != 9:
-                errors.append(f'Custom zone {i+1} must have exactly 9 cells')
+        for i, (zone, cells, zone_error) in enumerate(zip(layout.zones, layout.compiled, layout.zone_errors)):
+            if cells is None:
+                errors.append(zone_error)
                 continue
             
-            zone_values = []
-            for row, col in zone:
-                if 0 <= row < 9 and 0 <= col < 9:
-                    zone_values.append(board[row][col])
-                else:
-                    errors.append(f'Custom zone {i+1} has invalid coordinates ({row}, {col})')
-                    break
+            zone_values = [board[cell // 9][cell % 9] for cell in cells]
+            if zone_error:
+                errors.append(zone_error)
             
             filled_cells = [cell for cell in zone_values if cell != 0]
             if len(filled_cells) != len(set(filled_cells)):
@@ -136,4 +294,298 @@ class SudokuValidator:
             'valid': len(errors) == 0,
             'errors': errors,
             'zones': zone_details
-        }
\ No newline at end of file
+        }
+
+
+class ZoneLayout:
+    """
+    Compiled Custom-Zone Layout
+    
+    Checks a list of custom zones once and compiles it into flat cell
+    indices (row * 9 + col) plus a cell -> zones index. Layouts are cached
+    by a hash of their content, so boards validated against a layout seen
+    before skip the coordinate checks, and callers can refer to a layout
+    by its layout_id instead of resending the coordinates. Layouts made
+    with register are kept apart from the cache, so inline compiles of
+    other layouts never evict an id a client was handed.
+    """
+    
+    # Number of compiled layouts kept in the cache
+    CACHE_SIZE = 128
+    
+    # Number of registered layouts kept, least recently used dropped first
+    REGISTERED_SIZE = 1024
+    
+    _cache = OrderedDict()
+    _registered = OrderedDict()
+    
+    def __init__(self, custom_zones):
+        """
+        Args:
+            custom_zones: List of zones, each zone is a list of (row, col) coordinates
+            
+        Raises:
+            ValueError: If custom_zones is not a list of zones
+        """
+        self.zones = self._canonical_zones(custom_zones)
+        self.layout_id = self.content_hash(self.zones)
+        
+        # Per zone: flat cell indices (None if the zone is unusable) and error message
+        self.compiled = []
+        self.zone_errors = []
+        for i, zone in enumerate(self.zones):
+            if zone is None:
+                self.compiled.append(None)
+                self.zone_errors.append(f'Custom zone {i+1} must be a list of (row, col) cells')
+                continue
+            if len(zone) != 9:
+                self.compiled.append(None)
+                self.zone_errors.append(f'Custom zone {i+1} must have exactly 9 cells')
+                continue
+            
+            cells = []
+            error = None
+            for row, col in zone:
+                if 0 <= row < 9 and 0 <= col < 9:
+                    cells.append(row * 9 + col)
+                else:
+                    error = f'Custom zone {i+1} has invalid coordinates ({row}, {col})'
+                    break
+            self.compiled.append(tuple(cells))
+            self.zone_errors.append(error)
+        
+        self.errors = [error for error in self.zone_errors if error]
+        self.valid = not self.errors
+        
+        # Cell indices of every zone and the zones containing each cell
+        self.zone_cells = tuple(self.compiled) if self.valid else ()
+        self.cell_zones = [[] for _ in range(81)]
+        for z, cells in enumerate(self.zone_cells):
+            for cell in cells:
+                self.cell_zones[cell].append(z)
+        
+        # All units (standard ones first, then zones) and their peers, built on demand
+        self.units = STANDARD_UNITS + self.zone_cells
+        self._peers = None
+    
+    @property
+    def peers(self):
+        """For each cell, the other cells sharing a unit with it"""
+        if self._peers is None:
+            peers = [set() for _ in range(81)]
+            for unit in self.units:
+                for cell in unit:
+                    peers[cell].update(unit)
+            self._peers = [tuple(sorted(cell_peers - {cell})) for cell, cell_peers in enumerate(peers)]
+        return self._peers
+    
+    def __len__(self):
+        return len(self.zones)
+    
+    def __iter__(self):
+        return iter(self.zones)
+    
+    @staticmethod
+    def content_hash(custom_zones):
+        """
+        Stable hash of a zone list, used as its layout_id
+        
+        Zones are canonicalized first, so malformed zones hash like any
+        other and are reported by the zone checks instead of failing here.
+        """
+        canonical = json.dumps(ZoneLayout._canonical_zones(custom_zones), separators=(',', ':'))
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def _canonical_zones(custom_zones):
+        """
+        Zones as lists of [row, col] integer pairs, None for a malformed zone
+        
+        Raises:
+            ValueError: If custom_zones is not a list of zones
+        """
+        if isinstance(custom_zones, (str, bytes, dict)):
+            raise ValueError('Custom zones must be a list of zones')
+        try:
+            zones = list(custom_zones)
+        except TypeError:
+            raise ValueError('Custom zones must be a list of zones') from None
+        
+        canonical = []
+        for zone in zones:
+            cells = None
+            if isinstance(zone, (list, tuple)):
+                cells = []
+                for cell in zone:
+                    if (not isinstance(cell, (list, tuple)) or len(cell) != 2 or
+                            not all(isinstance(v, int) for v in cell)):
+                        cells = None
+                        break
+                    cells.append([int(cell[0]), int(cell[1])])
+            canonical.append(cells)
+        return canonical
+    
+    @classmethod
+    def compile(cls, custom_zones):
+        """
+        Get the compiled layout for a zone list, using the cache
+        
+        Args:
+            custom_zones: List of zones, or a ZoneLayout (returned as is)
+            
+        Returns:
+            ZoneLayout: Compiled layout
+        """
+        if isinstance(custom_zones, ZoneLayout):
+            return custom_zones
+        
+        layout_id = cls.content_hash(custom_zones)
+        layout = cls._registered.get(layout_id)
+        if layout is not None:
+            return layout
+        layout = cls._cache.get(layout_id)
+        if layout is None:
+            layout = cls(custom_zones)
+        cls._store(layout)
+        return layout
+    
+    @classmethod
+    def register(cls, custom_zones):
+        """
+        Compile a zone list and pin it so get() keeps finding its layout_id
+        
+        Args:
+            custom_zones: List of zones
+            
+        Returns:
+            ZoneLayout: Compiled layout
+        """
+        layout = cls.compile(custom_zones)
+        cls._cache.pop(layout.layout_id, None)
+        cls._registered[layout.layout_id] = layout
+        cls._registered.move_to_end(layout.layout_id)
+        if len(cls._registered) > cls.REGISTERED_SIZE:
+            cls._registered.popitem(last=False)
+        return layout
+    
+    @classmethod
+    def get(cls, layout_id):
+        """
+        Look up a registered or cached layout by its layout_id
+        
+        Raises:
+            ValueError: If the layout is not (or no longer) known
+        """
+        for layouts in (cls._registered, cls._cache):
+            layout = layouts.get(layout_id)
+            if layout is not None:
+                layouts.move_to_end(layout_id)
+                return layout
+        raise ValueError(f'Unknown zone layout: {layout_id}')
+    
+    @classmethod
+    def _store(cls, layout):
+        """Insert or refresh a layout in the LRU cache"""
+        cls._cache[layout.layout_id] = layout
+        cls._cache.move_to_end(layout.layout_id)
+        if len(cls._cache) > cls.CACHE_SIZE:
+            cls._cache.popitem(last=False)
+
+
+class ConflictTracker:
+    """
+    Incremental Sudoku validation for cell-by-cell edits
+    
+    Keeps an occurrence counter per unit and digit, plus the units (row,
+    column, box and custom zones) containing each cell. Changing a cell
+    only touches the 3 + k units that contain it, and a conflict appears
+    or disappears exactly when a counter crosses between 1 and 2.
+    """
+    
+    def __init__(self, board, custom_zones=()):
+        """
+        Args:
+            board: 9x9 matrix with integers 0-9 (0 represents empty cell)
+            custom_zones: List of zones or a compiled ZoneLayout
+        """
+        if not SudokuValidator()._validate_board_format(board):
+            raise ValueError('Board must be 9x9 matrix with integers 0-9')
+        self.layout = ZoneLayout.compile(custom_zones)
+        if not self.layout.valid:
+            raise ValueError(self.layout.errors[0])
+        
+        # cell_units[cell] lists the indices into layout.units containing the cell
+        self.cell_units = [[] for _ in range(81)]
+        for u, unit in enumerate(self.layout.units):
+            for cell in unit:
+                self.cell_units[cell].append(u)
+        
+        # counts[unit * 10 + digit] is how often digit occurs in unit
+        self.cells = bytearray(81)
+        self.counts = array('B', [0]) * (len(self.layout.units) * 10)
+        self.conflict_count = 0
+        for r, row in enumerate(board):
+            for c, value in enumerate(row):
+                self.update(r, c, value)
+    
+    @property
+    def valid(self):
+        return self.conflict_count == 0
+    
+    def update(self, row, col, value):
+        """
+        Set one cell (0 clears it)
+        
+        Returns:
+            list: Conflicts that appeared or disappeared, as dicts with the
+            unit name, the digit and whether the unit now has a conflict
+        """
+        if not (0 <= row < 9 and 0 <= col < 9):
+            raise ValueError(f'Cell ({row}, {col}) is outside the board')
+        if not isinstance(value, int) or not 0 <= value <= 9:
+            raise ValueError('Cell values must be integers 0-9')
+        
+        cell = row * 9 + col
+        old = self.cells[cell]
+        if old == value:
+            return []
+        self.cells[cell] = value
+        
+        counts = self.counts
+        changes = []
+        for u in self.cell_units[cell]:
+            if old:
+                counts[u * 10 + old] -= 1
+                if counts[u * 10 + old] == 1:
+                    changes.append({'unit': self.unit_name(u), 'digit': old, 'conflict': False})
+            if value:
+                counts[u * 10 + value] += 1
+                if counts[u * 10 + value] == 2:
+                    changes.append({'unit': self.unit_name(u), 'digit': value, 'conflict': True})
+        
+        self.conflict_count += sum(1 if change['conflict'] else -1 for change in changes)
+        return changes
+    
+    def errors(self):
+        """Current conflicts, worded like validate_with_custom_zones"""
+        return [
+            f'{self.unit_name(u)} has duplicate values'
+            for u in range(len(self.layout.units))
+            if any(count > 1 for count in self.counts[u * 10 + 1:u * 10 + 10])
+        ]
+    
+    def to_board(self):
+        """Current board as a 9x9 matrix"""
+        return [list(self.cells[r * 9:(r + 1) * 9]) for r in range(9)]
+    
+    @staticmethod
+    def unit_name(u):
+        """Display name of a unit index into ZoneLayout.units"""
+        if u < 9:
+            return f'Row {u+1}'
+        if u < 18:
+            return f'Column {u-8}'
+        if u < 27:
+            box = u - 18
+            return f'3x3 box at ({box // 3 + 1}, {box % 3 + 1})'
+        return f'Custom zone {u-26}'
@@ -0,0 +1,84 @@
+_UNBUILT = object()
+
+# trace value asking solvers for LazyTrace instead of built trace data
+LAZY = 'lazy'
+
+class LazyTrace:
+    """
+    Trace data built on first use
+    
+    Solvers called with trace=LAZY wrap human-readable trace data
+    (explanations, execution steps, visualizations) in a LazyTrace holding
+    the function that builds it and the raw values it needs. Nothing is
+    formatted until the trace is read: the API's JSON provider resolves it
+    while serializing a response, and in Python it compares, iterates,
+    indexes and prints like the value it stands for. Code that needs the
+    real type (str methods, json.dumps) calls resolve() first.
+    """
+    
+    __slots__ = ('_build', '_args', '_value')
+    
+    def __init__(self, build, *args):
+        """
+        Args:
+            build: Function returning the trace value
+            *args: Arguments passed to build
+        """
+        self._build = build
+        self._args = args
+        self._value = _UNBUILT
+    
+    def resolve(self):
+        """Build the value (once) and return it"""
+        if self._value is _UNBUILT:
+            self._value = self._build(*self._args)
+            self._build = self._args = None
+        return self._value
+    
+    def __eq__(self, other):
+        return self.resolve() == resolve(other)
+    
+    __hash__ = None
+    
+    def __len__(self):
+        return len(self.resolve())
+    
+    def __iter__(self):
+        return iter(self.resolve())
+    
+    def __getitem__(self, key):
+        return self.resolve()[key]
+    
+    def __contains__(self, item):
+        return item in self.resolve()
+    
+    def __str__(self):
+        return str(self.resolve())
+    
+    def __repr__(self):
+        return f'LazyTrace({self.resolve()!r})'
+
+
+def resolve(value):
+    """The built value of a LazyTrace; anything else is returned unchanged"""
+    if isinstance(value, LazyTrace):
+        return value.resolve()
+    return value
+
+
+def lazy_trace(trace, build, *args):
+    """
+    Trace helper for solvers
+    
+    Args:
+        trace: True to build the trace now, LAZY to defer it, or False
+        build, *args: Function building the trace value and its arguments
+        
+    Returns:
+        The trace value, a LazyTrace with trace=LAZY, or None when off
+    """
+    if not trace:
+        return None
+    if trace == LAZY:
+        return LazyTrace(build, *args)
+    return build(*args)
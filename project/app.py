@@ -1,25 +1,98 @@
+import uuid
+from collections import OrderedDict
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from algorithms.sudoku_validator import SudokuValidator
-from algorithms.alien_dictionary import AlienDictionary
+from algorithms.sudoku_validator import SudokuValidator, ZoneLayout, ConflictTracker
+from algorithms.sudoku_solver import SudokuSolver
+from algorithms.alien_dictionary import AlienDictionary, IncrementalAlienOrder
 from algorithms.knights_portals import KnightsPortals
 from algorithms.bitwise_matching import BitwiseMatching
-from algorithms.matrix_islands import MatrixIslands
-from algorithms.mini_interpreter import MiniInterpreter
+from algorithms.matrix_islands import MatrixIslands, IslandTracker
+from algorithms.mini_interpreter import MiniInterpreter, BudgetExceeded
+from algorithms.grid_encoding import decode_grid, compress_visualization
+from algorithms.tracing import LAZY, LazyTrace, lazy_trace
+
+class TraceJSONProvider(DefaultJSONProvider):
+    """JSON provider that builds lazy trace data while serializing"""
+    
+    def default(self, o):
+        if isinstance(o, LazyTrace):
+            return o.resolve()
+        return super().default(o)
 
 app = Flask(__name__)
+app.json = TraceJSONProvider(app)
 CORS(app)  # Enable CORS for React frontend
 
+# Stateful objects behind the session endpoints, least recently used evicted first
+MAX_SESSIONS = 1000
+sessions = OrderedDict()
+
+# Largest number of solutions a solve request may ask the solver to count
+MAX_SOLUTION_LIMIT = 100
+
+# Wall-clock seconds a mini interpreter request may run
+MINI_INTERPRETER_TIME_LIMIT = 1.0
+
+def create_session(state):
+    """Store a session object and return its id"""
+    session_id = uuid.uuid4().hex
+    sessions[session_id] = state
+    if len(sessions) > MAX_SESSIONS:
+        sessions.popitem(last=False)
+    return session_id
+
+class UnknownSession(LookupError):
+    """Raised for a session id that is unknown, ended or evicted; answered with a 404"""
+
+def get_session(session_id, kind):
+    """Look up a session object of the given type"""
+    state = sessions.get(session_id)
+    if not isinstance(state, kind):
+        raise UnknownSession(f'Unknown session: {session_id}')
+    sessions.move_to_end(session_id)
+    return state
+
+def zone_layout_from_request(data):
+    """Custom zones of a request, given inline or as a registered zone_layout id"""
+    if data.get('zone_layout'):
+        return ZoneLayout.get(data['zone_layout'])
+    return ZoneLayout.compile(data.get('custom_zones', []))
+
+def limit_from_request(data):
+    """Solution limit of a solve request, clamped to MAX_SOLUTION_LIMIT"""
+    limit = data.get('limit', 2)
+    if type(limit) is not int or limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, MAX_SOLUTION_LIMIT)
+
+def trace_from_request(data, default=True):
+    """Trace flag of a request; trace data is then built while serializing the response"""
+    return LAZY if data.get('trace', default) else False
+
+def bindings_from_request(data):
+    """Variable bindings of a mini interpreter batch request, numbers and booleans only"""
+    bindings = data.get('bindings', [])
+    if not isinstance(bindings, list) or not all(isinstance(binding, dict) for binding in bindings):
+        raise ValueError('bindings must be a list of objects')
+    for binding in bindings:
+        for name, value in binding.items():
+            if type(value) not in (int, float, bool):
+                raise ValueError(f'Unsupported value for {name}: {type(value).__name__}')
+    return bindings
+
 @app.route('/api/sudoku/validate', methods=['POST'])
 def validate_sudoku():
     """Validate Sudoku board with custom zones"""
     try:
         data = request.get_json()
         board = data.get('board', [])
-        custom_zones = data.get('custom_zones', [])
+        custom_zones = zone_layout_from_request(data)
+        trace = trace_from_request(data)
         
         validator = SudokuValidator()
-        result = validator.validate_with_custom_zones(board, custom_zones)
+        result = validator.validate_with_custom_zones(board, custom_zones, trace)
         
         return jsonify({
             'success': True,
@@ -30,15 +103,132 @@ def validate_sudoku():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/sudoku/zone-layouts', methods=['POST'])
+def register_zone_layout():
+    """Compile a custom-zone layout so later requests can refer to it by id"""
+    try:
+        data = request.get_json()
+        layout = ZoneLayout.register(data.get('custom_zones', []))
+        
+        return jsonify({
+            'success': True,
+            'zone_layout': layout.layout_id,
+            'valid': layout.valid,
+            'errors': layout.errors
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/sudoku/validate-batch', methods=['POST'])
+def validate_sudoku_batch():
+    """Pass/fail validation of many Sudoku boards sharing custom zones"""
+    try:
+        data = request.get_json()
+        boards = data.get('boards', [])
+        custom_zones = zone_layout_from_request(data)
+        
+        validator = SudokuValidator()
+        results = validator.validate_many(boards, custom_zones)
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'valid_count': sum(results)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/sudoku/solve', methods=['POST'])
+def solve_sudoku():
+    """Solve a Sudoku board with custom zones and count its solutions"""
+    try:
+        data = request.get_json()
+        board = data.get('board', [])
+        custom_zones = zone_layout_from_request(data)
+        limit = limit_from_request(data)
+        trace = trace_from_request(data)
+        
+        solver = SudokuSolver()
+        result = solver.solve(board, custom_zones, limit, trace)
+        
+        return jsonify({
+            'success': True,
+            'solution_count': result['solution_count'],
+            'unique': result['unique'],
+            'solution': result['solution'],
+            'errors': result['errors'],
+            'details': result['details']
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/sudoku/sessions', methods=['POST'])
+def sudoku_session():
+    """Start an incremental validation session for a board"""
+    try:
+        data = request.get_json()
+        board = data.get('board', [])
+        custom_zones = zone_layout_from_request(data)
+        trace = trace_from_request(data)
+        
+        tracker = ConflictTracker(board, custom_zones)
+        result = SudokuValidator().validate_with_custom_zones(board, custom_zones, trace)
+        
+        return jsonify({
+            'success': True,
+            'session_id': create_session(tracker),
+            'valid': tracker.valid,
+            'errors': tracker.errors(),
+            'details': result['details']
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/sudoku/sessions/<session_id>/cells', methods=['POST'])
+def sudoku_session_update(session_id):
+    """Set one cell of a session board and report the conflicts it changed"""
+    try:
+        data = request.get_json()
+        row, col = data['row'], data['col']
+        value = data.get('value', 0)
+        trace = trace_from_request(data, False)
+        
+        tracker = get_session(session_id, ConflictTracker)
+        changes = tracker.update(row, col, value)
+        
+        return jsonify({
+            'success': True,
+            'valid': tracker.valid,
+            'changes': changes,
+            'errors': lazy_trace(trace, tracker.errors)
+        })
+    except UnknownSession as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/sudoku/sessions/<session_id>', methods=['DELETE'])
+def sudoku_session_end(session_id):
+    """End an incremental validation session"""
+    try:
+        get_session(session_id, ConflictTracker)
+        del sessions[session_id]
+        return jsonify({'success': True})
+    except UnknownSession as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/api/alien-dictionary', methods=['POST'])
 def alien_dictionary():
     """Determine alien language character order"""
     try:
         data = request.get_json()
         words = data.get('words', [])
+        trace = trace_from_request(data)
         
         alien_dict = AlienDictionary()
-        result = alien_dict.find_order(words)
+        result = alien_dict.find_order(words, trace)
         
         return jsonify({
             'success': True,
@@ -49,22 +239,121 @@ def alien_dictionary():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/alien-dictionary/sessions', methods=['POST'])
+def alien_dictionary_session():
+    """Start an incremental order session from an initial sorted word list"""
+    try:
+        data = request.get_json()
+        words = data.get('words', [])
+        trace = trace_from_request(data)
+        
+        tracker = IncrementalAlienOrder(words, trace)
+        
+        return jsonify({
+            'success': True,
+            'session_id': create_session(tracker),
+            'order': tracker.order
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/alien-dictionary/sessions/<session_id>/words', methods=['POST'])
+def alien_dictionary_append(session_id):
+    """Append words to a session lexicon, stopping at the first invalid one"""
+    try:
+        data = request.get_json()
+        words = data.get('words', [])
+        
+        tracker = get_session(session_id, IncrementalAlienOrder)
+        result = {
+            'order': tracker.order,
+            'valid': True,
+            'explanation': 'No words appended' if tracker.trace else None
+        }
+        appended = 0
+        for word in words:
+            result = tracker.append(word)
+            if not result['valid']:
+                break
+            appended += 1
+        
+        return jsonify({
+            'success': True,
+            'appended': appended,
+            'order': tracker.order,
+            'valid': result['valid'],
+            'explanation': result['explanation']
+        })
+    except UnknownSession as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/alien-dictionary/sessions/<session_id>', methods=['DELETE'])
+def alien_dictionary_session_end(session_id):
+    """End an incremental order session"""
+    try:
+        get_session(session_id, IncrementalAlienOrder)
+        del sessions[session_id]
+        return jsonify({'success': True})
+    except UnknownSession as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/api/knights-portals', methods=['POST'])
 def knights_portals():
     """Find shortest path with teleportation option"""
     try:
         data = request.get_json()
-        grid = data.get('grid', [])
+        grid = decode_grid(data.get('grid', []))
+        engine = data.get('engine', 'auto')
+        trace = trace_from_request(data)
         
-        knights = KnightsPortals()
-        result = knights.shortest_path(grid)
+        knights = KnightsPortals(engine=engine)
+        result = knights.shortest_path(grid, trace)
+        
+        visualization = result['visualization']
+        if visualization is not None and data.get('visualization_format') == 'rle':
+            visualization = LazyTrace(compress_visualization, visualization)
         
         return jsonify({
             'success': True,
             'shortest_path': result['path'],
             'distance': result['distance'],
             'used_teleport': result['used_teleport'],
-            'path_visualization': result['visualization']
+            'path_visualization': visualization,
+            'nodes_expanded': result['nodes_expanded']
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/knights-portals/batch', methods=['POST'])
+def knights_portals_batch():
+    """Answer many start/end queries on one grid"""
+    try:
+        data = request.get_json()
+        grid = decode_grid(data.get('grid', []))
+        queries = data.get('queries', [])
+        
+        knights = KnightsPortals()
+        prepared = knights.prepare(grid)
+        results = prepared.query_many(
+            (query['start'], query['end']) for query in queries
+        )
+        
+        return jsonify({
+            'success': True,
+            'results': [
+                {
+                    'start': query['start'],
+                    'end': query['end'],
+                    'shortest_path': result['path'],
+                    'distance': result['distance'],
+                    'used_teleport': result['used_teleport']
+                }
+                for query, result in zip(queries, results)
+            ]
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
@@ -75,9 +364,10 @@ def bitwise_matching():
     try:
         data = request.get_json()
         n = data.get('number', 0)
+        trace = trace_from_request(data)
         
         bitwise = BitwiseMatching()
-        result = bitwise.next_larger_same_bits(n)
+        result = bitwise.next_larger_same_bits(n, trace)
         
         return jsonify({
             'success': True,
@@ -90,34 +380,145 @@ def bitwise_matching():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/bitwise-matching/batch', methods=['POST'])
+def bitwise_matching_batch():
+    """Find next larger integers with same number of 1s for many numbers"""
+    try:
+        data = request.get_json()
+        numbers = data.get('numbers', [])
+        bit_width = data.get('bit_width', 31)
+        trace = trace_from_request(data, False)
+        
+        bitwise = BitwiseMatching()
+        result = bitwise.next_larger_same_bits_many(numbers, trace, bit_width)
+        
+        response = {
+            'success': True,
+            'results': result['results']
+        }
+        if trace:
+            response['explanations'] = result['explanations']
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/api/matrix-islands', methods=['POST'])
 def matrix_islands():
     """Count islands including diagonal connections"""
     try:
         data = request.get_json()
-        matrix = data.get('matrix', [])
+        matrix = decode_grid(data.get('matrix', []))
+        trace = trace_from_request(data)
         
         islands = MatrixIslands()
-        result = islands.count_islands_with_diagonals(matrix)
+        result = islands.count_islands_with_diagonals(matrix, trace)
+        
+        visualization = result['visualization']
+        if visualization is not None and data.get('visualization_format') == 'rle':
+            visualization = LazyTrace(compress_visualization, visualization)
         
         return jsonify({
             'success': True,
             'island_count': result['count'],
             'islands': result['islands'],
-            'visualization': result['visualization']
+            'visualization': visualization
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/matrix-islands/stream', methods=['POST'])
+def matrix_islands_stream():
+    """Count islands from a row-per-line (NDJSON or digit string) request body"""
+    try:
+        # The body holds the rows, so trace comes from the query string
+        trace = request.args.get('trace', 'true') != 'false'
+        
+        islands = MatrixIslands()
+        result = islands.count_islands_streaming(iter(request.stream.readline, b''), trace)
+        
+        return jsonify({
+            'success': True,
+            'island_count': result['count'],
+            'rows': result['rows'],
+            'cols': result['cols'],
+            'islands': result['islands']
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/matrix-islands/sessions', methods=['POST'])
+def matrix_islands_session():
+    """Start an incremental island session for a matrix"""
+    try:
+        data = request.get_json()
+        matrix = decode_grid(data.get('matrix', []))
+        trace = trace_from_request(data)
+        
+        tracker = IslandTracker(matrix)
+        
+        return jsonify({
+            'success': True,
+            'session_id': create_session(tracker),
+            'island_count': tracker.count,
+            'visualization': lazy_trace(trace, tracker.visualization)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/matrix-islands/sessions/<session_id>/cells', methods=['POST'])
+def matrix_islands_toggle(session_id):
+    """Set one cell of a session matrix to land or water"""
+    try:
+        data = request.get_json()
+        row, col = data['row'], data['col']
+        value = data.get('value', 1)
+        trace = trace_from_request(data, False)
+        
+        tracker = get_session(session_id, IslandTracker)
+        island_count = tracker.set_cell(row, col, value)
+        
+        return jsonify({
+            'success': True,
+            'island_count': island_count,
+            'island_size': tracker.island_size(row, col),
+            'visualization': lazy_trace(trace, tracker.visualization)
+        })
+    except UnknownSession as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/matrix-islands/sessions/<session_id>', methods=['DELETE'])
+def matrix_islands_session_end(session_id):
+    """End an incremental island session"""
+    try:
+        get_session(session_id, IslandTracker)
+        del sessions[session_id]
+        return jsonify({'success': True})
+    except UnknownSession as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/api/mini-interpreter', methods=['POST'])
 def mini_interpreter():
     """Evaluate let declarations and if conditions"""
     try:
         data = request.get_json()
         code = data.get('code', '')
+        trace = trace_from_request(data)
         
-        interpreter = MiniInterpreter()
-        result = interpreter.evaluate(code)
+        interpreter = MiniInterpreter(time_limit=MINI_INTERPRETER_TIME_LIMIT)
+        result = interpreter.evaluate(code, trace)
+        
+        if 'budget_exceeded' in result:
+            return jsonify({
+                'success': False,
+                'error': result['result'].removeprefix('Error: '),
+                'budget_exceeded': result['budget_exceeded'],
+                'variables': result['variables'],
+                'execution_steps': result['steps']
+            }), 400
         
         return jsonify({
             'success': True,
@@ -128,6 +529,30 @@ def mini_interpreter():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/api/mini-interpreter/batch', methods=['POST'])
+def mini_interpreter_batch():
+    """Evaluate one program against many variable bindings"""
+    try:
+        data = request.get_json()
+        code = data.get('code', '')
+        bindings = bindings_from_request(data)
+        trace = trace_from_request(data, False)
+        
+        interpreter = MiniInterpreter(time_limit=MINI_INTERPRETER_TIME_LIMIT)
+        result = interpreter.evaluate_many(code, bindings, trace)
+        
+        response = {
+            'success': True,
+            'results': result['results']
+        }
+        if trace:
+            response['execution_steps'] = result['steps']
+        return jsonify(response)
+    except BudgetExceeded as e:
+        return jsonify({'success': False, 'error': str(e), 'budget_exceeded': e.to_dict()}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
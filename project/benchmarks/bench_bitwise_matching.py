@@ -0,0 +1,59 @@
+"""
+Benchmark enumeration of k-subsets of n items as bitmasks
+
+Compares repeated next_larger_same_bits calls, the combinations_bitmasks
+generator and the chunked NumPy variant, in subsets per second.
+
+Usage: python benchmarks/bench_bitwise_matching.py [n] [k]
+"""
+import os
+import sys
+import time
+
+# Add the parent directory to the path to import algorithms
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.bitwise_matching import BitwiseMatching, np
+
+
+def repeated_calls(bitwise, n, k):
+    """Walk the subsets through next_larger_same_bits result dicts"""
+    count, value, limit = 1, (1 << k) - 1, 1 << n
+    while True:
+        value = bitwise.next_larger_same_bits(value)['result']
+        if value == -1 or value >= limit:
+            return count
+        count += 1
+
+
+def generator(bitwise, n, k):
+    count = 0
+    for _ in bitwise.combinations_bitmasks(n, k):
+        count += 1
+    return count
+
+
+def numpy_chunks(bitwise, n, k):
+    return sum(len(chunk) for chunk in bitwise.combinations_bitmasks_array(n, k))
+
+
+def main(n, k):
+    bitwise = BitwiseMatching()
+    engines = [('repeated calls', repeated_calls), ('generator', generator)]
+    if np is not None:
+        engines.append(('numpy chunks', numpy_chunks))
+    
+    for name, run in engines:
+        if name == 'repeated calls' and n > 31:
+            print(f"{name:<16} skipped (limited to 31 bits)")
+            continue
+        started = time.perf_counter()
+        count = run(bitwise, n, k)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<16} {count:>12,} subsets {elapsed:>8.3f} s {count / elapsed:>16,.0f} /s")
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 11
+    main(n, k)
@@ -0,0 +1,51 @@
+"""
+Benchmark the pure-Python and NumPy knight BFS engines
+
+Usage: python benchmarks/bench_knights_portals.py [size ...]
+"""
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the path to import algorithms
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.knights_portals import KnightsPortals, np
+
+
+def make_grid(size, density=0.2, seed=0):
+    """Random square grid with open corners"""
+    rng = random.Random(seed)
+    grid = [[1 if rng.random() < density else 0 for _ in range(size)] for _ in range(size)]
+    grid[0][0] = grid[-1][-1] = 0
+    return grid
+
+
+def time_engine(engine, grid):
+    """Time one plain knight search from corner to corner"""
+    knights = KnightsPortals(engine=engine)
+    end = (len(grid) - 1, len(grid[0]) - 1)
+    started = time.perf_counter()
+    result = knights._find_path_no_teleport(grid, (0, 0), end)
+    return time.perf_counter() - started, result['distance']
+
+
+def main(sizes):
+    if np is None:
+        print('NumPy is not installed, only the python engine can run')
+    print(f"{'size':>6} {'python (s)':>12} {'numpy (s)':>12} {'speedup':>8} {'distance':>9}")
+    for size in sizes:
+        grid = make_grid(size)
+        python_time, distance = time_engine('python', grid)
+        if np is None:
+            print(f'{size:>6} {python_time:>12.3f} {"-":>12} {"-":>8} {distance:>9}')
+            continue
+        numpy_time, numpy_distance = time_engine('numpy', grid)
+        assert numpy_distance == distance
+        print(f'{size:>6} {python_time:>12.3f} {numpy_time:>12.3f} '
+              f'{python_time / numpy_time:>7.1f}x {distance:>9}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 300, 1000, 2000])
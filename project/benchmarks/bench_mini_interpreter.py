@@ -0,0 +1,48 @@
+"""
+Benchmark MiniInterpreter bulk evaluation
+
+Runs one program over columns x and y with evaluate_many (bytecode VM,
+one run per row) and with evaluate_columns (NumPy, one pass per column).
+
+Usage: python benchmarks/bench_mini_interpreter.py [rows]
+"""
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the path to import algorithms
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.mini_interpreter import MiniInterpreter, np
+
+
+PROGRAM = "let d = x * x + y * y; if (d <= 2500) then d - x * 2 else (x + y) // 3"
+
+
+def main(rows):
+    interpreter = MiniInterpreter()
+    rng = random.Random(0)
+    xs = [rng.randint(-100, 100) for _ in range(rows)]
+    ys = [rng.randint(-100, 100) for _ in range(rows)]
+    
+    started = time.perf_counter()
+    scalar = interpreter.evaluate_many(PROGRAM, ({'x': x, 'y': y} for x, y in zip(xs, ys)))
+    scalar_time = time.perf_counter() - started
+    print(f"{'evaluate_many':<18} {scalar_time:>8.3f} s  {rows / scalar_time:>14,.0f} rows/s")
+    
+    if np is None:
+        print('NumPy not installed, skipping evaluate_columns')
+        return
+    
+    columns = {'x': np.array(xs), 'y': np.array(ys)}
+    started = time.perf_counter()
+    vector = interpreter.evaluate_columns(PROGRAM, columns)
+    vector_time = time.perf_counter() - started
+    print(f"{'evaluate_columns':<18} {vector_time:>8.3f} s  {rows / vector_time:>14,.0f} rows/s"
+          f"  (vectorized: {vector['vectorized']}, {scalar_time / vector_time:.0f}x)")
+    assert vector['results'].tolist() == scalar['results']
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
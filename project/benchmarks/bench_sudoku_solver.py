@@ -0,0 +1,48 @@
+"""
+Benchmark the constraint-propagating Sudoku solver on hard puzzles
+
+Each puzzle is solved with limit=2, the uniqueness check used when
+generating puzzles.
+
+Usage: python benchmarks/bench_sudoku_solver.py [repeats]
+"""
+import os
+import sys
+import time
+
+# Add the parent directory to the path to import algorithms
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.sudoku_solver import SudokuSolver
+
+
+HARD_PUZZLES = {
+    'Inkala 2012': '800000000003600000070090200050007000000045700000100030001000068008500010090000400',
+    'Norvig hard1': '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......',
+    'AI Escargot': '1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..',
+    'Easter Monster': '1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1',
+    'Brute-force killer': '..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9',
+}
+
+
+def parse(puzzle):
+    """Turn an 81-character puzzle string into a 9x9 board"""
+    return [[0 if ch == '.' else int(ch) for ch in puzzle[r * 9:(r + 1) * 9]] for r in range(9)]
+
+
+def main(repeats):
+    solver = SudokuSolver()
+    total = 0.0
+    for name, puzzle in HARD_PUZZLES.items():
+        board = parse(puzzle)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            result = solver.solve(board, limit=2)
+        elapsed = (time.perf_counter() - started) / repeats
+        total += elapsed
+        print(f"{name:<20} {elapsed * 1000:>9.2f} ms  unique={result['unique']}")
+    print(f"{'average':<20} {total / len(HARD_PUZZLES) * 1000:>9.2f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,45 @@
+"""
+Benchmark Sudoku validation throughput
+
+Compares the per-board bitmask fast path (validate_many) with the NumPy
+corpus validator (validate_array) on copies of a solved board with a
+diagonal custom zone.
+
+Usage: python benchmarks/bench_sudoku_validator.py [boards]
+"""
+import os
+import sys
+import time
+
+# Add the parent directory to the path to import algorithms
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.sudoku_validator import SudokuValidator, np
+
+
+SOLVED = [[(r * 3 + r // 3 + c) % 9 + 1 for c in range(9)] for r in range(9)]
+ZONES = [[(i, (i * 4) % 9) for i in range(9)]]
+
+
+def main(count):
+    validator = SudokuValidator()
+    
+    boards = [SOLVED] * min(count, 100000)
+    started = time.perf_counter()
+    validator.validate_many(boards, ZONES)
+    elapsed = time.perf_counter() - started
+    print(f'validate_many:  {len(boards) / elapsed * 60:>14,.0f} boards/min')
+    
+    if np is None:
+        print('NumPy is not installed, skipping validate_array')
+        return
+    
+    corpus = np.tile(np.array(SOLVED, dtype=np.uint8), (count, 1, 1))
+    started = time.perf_counter()
+    validator.validate_array(corpus, ZONES)
+    elapsed = time.perf_counter() - started
+    print(f'validate_array: {count / elapsed * 60:>14,.0f} boards/min')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -5,12 +5,16 @@ import os
 # Add the parent directory to the path to import algorithms
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from algorithms.sudoku_validator import SudokuValidator
-from algorithms.alien_dictionary import AlienDictionary
+from algorithms.sudoku_validator import SudokuValidator, ZoneLayout, ConflictTracker
+from algorithms.sudoku_solver import SudokuSolver
+from algorithms.alien_dictionary import AlienDictionary, IncrementalAlienOrder
 from algorithms.knights_portals import KnightsPortals
 from algorithms.bitwise_matching import BitwiseMatching
-from algorithms.matrix_islands import MatrixIslands
-from algorithms.mini_interpreter import MiniInterpreter
+from algorithms.matrix_islands import MatrixIslands, IslandTracker
+from algorithms.mini_interpreter import MiniInterpreter, BudgetExceeded
+from algorithms.grid_encoding import PackedGrid, compress_visualization
+from algorithms.tracing import LAZY, LazyTrace, lazy_trace
+from app import app
 
 class TestSudokuValidator:
     def test_valid_board(self):
@@ -48,6 +52,133 @@ class TestSudokuValidator:
         assert result['valid'] == False
         assert 'Row 1 has duplicate values' in result['errors']
 
+    def test_fast_path_and_batch(self):
+        validator = SudokuValidator()
+        solved = [[(r * 3 + r // 3 + c) % 9 + 1 for c in range(9)] for r in range(9)]
+        duplicate = [row[:] for row in solved]
+        duplicate[0][0] = duplicate[0][1]
+        diagonal = [[(i, i) for i in range(9)]]
+        assert validator.is_valid(solved) == True
+        assert validator.is_valid(duplicate) == False
+        assert validator.validate_many([solved, duplicate, [[0] * 9] * 9]) == [True, False, True]
+        assert validator.validate_many([solved], diagonal) == [
+            validator.validate_with_custom_zones(solved, diagonal)['valid']
+        ]
+        assert validator.validate_many([solved], [[(0, 0)]]) == [False]
+
+    def test_validate_array(self, tmp_path):
+        np = pytest.importorskip('numpy')
+        validator = SudokuValidator()
+        solved = [[(r * 3 + r // 3 + c) % 9 + 1 for c in range(9)] for r in range(9)]
+        boards = np.array([solved] * 3, dtype=np.uint8)
+        boards[1, 0, 0] = boards[1, 0, 1]
+        boards[2, 4, 4] = 12
+        result = validator.validate_array(boards)
+        assert list(result['valid']) == [True, False, False]
+        assert result['failure_codes'][1] == (
+            SudokuValidator.FAIL_ROWS | SudokuValidator.FAIL_COLUMNS | SudokuValidator.FAIL_BOXES
+        )
+        assert result['failure_codes'][2] == SudokuValidator.FAIL_FORMAT
+        
+        path = str(tmp_path / 'boards.npy')
+        np.save(path, boards)
+        assert list(validator.validate_array(path)['valid']) == [True, False, False]
+
+class TestZoneLayout:
+    def test_layout_is_cached_by_content(self):
+        zones = [[(i, i) for i in range(9)]]
+        layout = ZoneLayout.compile(zones)
+        assert ZoneLayout.compile([[[i, i] for i in range(9)]]) is layout
+        assert ZoneLayout.get(layout.layout_id) is layout
+        assert layout.valid == True
+        assert layout.zone_cells == ((0, 10, 20, 30, 40, 50, 60, 70, 80),)
+
+    def test_invalid_layout_reports_errors(self):
+        layout = ZoneLayout.compile([[(0, 0)] * 8, [(0, i) for i in range(8)] + [(9, 0)]])
+        assert layout.valid == False
+        assert layout.errors == [
+            'Custom zone 1 must have exactly 9 cells',
+            'Custom zone 2 has invalid coordinates (9, 0)'
+        ]
+        with pytest.raises(ValueError):
+            ZoneLayout.get('missing')
+
+    def test_malformed_zones_get_zone_errors(self):
+        layout = ZoneLayout.compile([5, [(0, 'a')] * 9, [[0, 1.5]] * 9, [(i, i) for i in range(9)]])
+        assert layout.valid == False
+        assert layout.errors == [f'Custom zone {i} must be a list of (row, col) cells' for i in (1, 2, 3)]
+        board = [[0] * 9 for _ in range(9)]
+        assert SudokuValidator().validate_with_custom_zones(board, [[None]])['errors'] == [
+            'Custom zone 1 must be a list of (row, col) cells'
+        ]
+        with pytest.raises(ValueError):
+            ZoneLayout.compile(5)
+
+    def test_registered_layout_survives_cache_churn(self):
+        layout = ZoneLayout.register([[(8 - i, i) for i in range(9)]])
+        for r in range(ZoneLayout.CACHE_SIZE + 10):
+            ZoneLayout.compile([[(r % 9, i) for i in range(9)]] * (r // 9 + 1))
+        assert ZoneLayout.get(layout.layout_id) is layout
+        assert ZoneLayout.compile([[(8 - i, i) for i in range(9)]]) is layout
+
+    def test_validator_accepts_layout(self):
+        validator = SudokuValidator()
+        board = [[0] * 9 for _ in range(9)]
+        board[0][0] = board[8][8] = 5
+        layout = ZoneLayout.compile([[(i, i) for i in range(9)]])
+        result = validator.validate_with_custom_zones(board, layout)
+        assert result['errors'] == ['Custom zone 1 has duplicate values']
+        assert validator.is_valid(board, layout) == False
+
+class TestConflictTracker:
+    def test_update_reports_changed_conflicts(self):
+        tracker = ConflictTracker([[0] * 9 for _ in range(9)])
+        assert tracker.update(0, 0, 5) == []
+        changes = tracker.update(0, 4, 5)
+        assert changes == [{'unit': 'Row 1', 'digit': 5, 'conflict': True}]
+        assert tracker.valid == False
+        assert tracker.errors() == ['Row 1 has duplicate values']
+        assert tracker.update(0, 4, 0) == [{'unit': 'Row 1', 'digit': 5, 'conflict': False}]
+        assert tracker.valid == True
+
+    def test_matches_full_validation_with_zones(self):
+        import random
+        rng = random.Random(7)
+        diagonal = [[(i, i) for i in range(9)]]
+        validator = SudokuValidator()
+        tracker = ConflictTracker([[0] * 9 for _ in range(9)], diagonal)
+        for _ in range(300):
+            tracker.update(rng.randrange(9), rng.randrange(9), rng.randrange(10))
+            board = tracker.to_board()
+            assert tracker.valid == validator.is_valid(board, diagonal)
+            assert tracker.errors() == validator.validate_with_custom_zones(board, diagonal)['errors']
+
+class TestSudokuSolver:
+    def test_unique_hard_puzzle(self):
+        solver = SudokuSolver()
+        puzzle = '800000000003600000070090200050007000000045700000100030001000068008500010090000400'
+        board = [[int(ch) for ch in puzzle[r * 9:(r + 1) * 9]] for r in range(9)]
+        result = solver.solve(board)
+        assert result['solution_count'] == 1
+        assert result['unique'] == True
+        assert SudokuValidator().is_valid(result['solution']) == True
+        assert all(board[r][c] in (0, result['solution'][r][c]) for r in range(9) for c in range(9))
+
+    def test_custom_zones_and_early_stop(self):
+        solver = SudokuSolver()
+        empty = [[0] * 9 for _ in range(9)]
+        diagonals = [[(i, i) for i in range(9)], [(i, 8 - i) for i in range(9)]]
+        result = solver.solve(empty, diagonals)
+        assert result['solution_count'] == 2
+        assert SudokuValidator().is_valid(result['solution'], diagonals) == True
+        first_only = solver.solve(empty, diagonals, limit=1)
+        assert first_only['solution_count'] == 1 and first_only['unique'] is None
+
+    def test_candidates(self):
+        solver = SudokuSolver()
+        board = [[5, 3, 0, 0, 7, 0, 0, 0, 0]] + [[0] * 9 for _ in range(8)]
+        assert solver.candidates(board)[0][2] == [1, 2, 4, 6, 8, 9]
+
 class TestAlienDictionary:
     def test_simple_order(self):
         alien_dict = AlienDictionary()
@@ -62,6 +193,44 @@ class TestAlienDictionary:
         result = alien_dict.find_order(words)
         assert result['valid'] == False
 
+    def test_stream_from_generator_and_file(self, tmp_path):
+        alien_dict = AlienDictionary()
+        words = ["wrt", "wrf", "er", "ett", "rftt"]
+        result = alien_dict.find_order_stream(word for word in words)
+        assert result['order'] == "wertf"
+        assert result['explanation'] is None
+
+        path = tmp_path / 'words.txt'
+        path.write_text('\n'.join(words) + '\n')
+        assert alien_dict.find_order_file(str(path))['order'] == "wertf"
+        assert alien_dict.find_order_stream(iter(["abc", "ab"]))['valid'] == False
+
+    def test_parallel_matches_serial(self):
+        alien_dict = AlienDictionary()
+        words = ["wrt", "wrf", "er", "ett", "rftt", "rftt", "t"]
+        assert alien_dict.find_order_parallel(words, workers=2, chunk_size=2, trace=True) == alien_dict.find_order(words)
+        cyclic = ["z", "x", "xa", "z"]
+        assert alien_dict.find_order_parallel(cyclic, workers=2, chunk_size=1) == alien_dict.find_order_stream(cyclic)
+        prefix = ["ab", "b", "bc", "b"]
+        assert alien_dict.find_order_parallel(prefix, workers=2, chunk_size=1) == alien_dict.find_order_stream(prefix)
+
+class TestIncrementalAlienOrder:
+    def test_append_maintains_order(self):
+        tracker = IncrementalAlienOrder(["wrt", "wrf"])
+        for word in ["er", "ett", "rftt"]:
+            assert tracker.append(word)['valid'] == True
+        assert tracker.order == "wertf"
+
+    def test_rejects_cycle_and_prefix_immediately(self):
+        tracker = IncrementalAlienOrder(["z", "x"])
+        result = tracker.append("z")
+        assert result['valid'] == False
+        assert 'Cycle' in result['explanation']
+        assert tracker.last_word == "x"
+        assert tracker.append("xa")['valid'] == True
+        assert tracker.append("x")['valid'] == False
+        assert sorted(tracker.order) == ["a", "x", "z"]
+
 class TestKnightsPortals:
     def test_simple_path(self):
         knights = KnightsPortals()
@@ -85,6 +254,84 @@ class TestKnightsPortals:
         # Should find a path using teleportation
         assert result['distance'] >= 0 or result['distance'] == -1
 
+    def test_teleport_through_walls(self):
+        knights = KnightsPortals()
+        grid = [
+            [0, 1, 0],
+            [1, 1, 1],
+            [0, 1, 0]
+        ]
+        result = knights.shortest_path(grid)
+        assert result['distance'] == 1
+        assert result['used_teleport'] == True
+        assert result['path'] == [(0, 0), (2, 2)]
+
+    def test_teleport_search_on_large_grid(self):
+        knights = KnightsPortals()
+        grid = [[0] * 200 for _ in range(200)]
+        result = knights._find_path_with_teleport(grid, (0, 0), (199, 199))
+        assert result['distance'] == 1
+        assert result['path'] == [(0, 0), (199, 199)]
+
+    def test_knight_path_reconstruction(self):
+        knights = KnightsPortals()
+        grid = [[0] * 8 for _ in range(8)]
+        result = knights._find_path_no_teleport(grid, (0, 0), (7, 7))
+        path = result['path']
+        assert result['distance'] == 6
+        assert path[0] == (0, 0) and path[-1] == (7, 7)
+        assert len(path) == result['distance'] + 1
+        for (r1, c1), (r2, c2) in zip(path, path[1:]):
+            assert sorted([abs(r1 - r2), abs(c1 - c2)]) == [1, 2]
+
+    def test_prepared_grid_queries(self):
+        knights = KnightsPortals()
+        grid = [[0] * 8 for _ in range(8)]
+        grid[3][3] = 1
+        prepared = knights.prepare(grid, sources=[(0, 0)])
+        results = prepared.query_many([
+            ((0, 0), (7, 7)),
+            ((0, 0), (1, 2)),
+            ((0, 0), (3, 3)),
+            ((1, 2), (0, 0))
+        ])
+        assert [r['distance'] for r in results] == [1, 1, -1, 1]
+        assert results[0]['used_teleport'] == True
+        assert results[1]['used_teleport'] == False
+        assert results[3]['path'] == [(1, 2), (0, 0)]
+        for source in [(3, 3), (-1, 0), (0, 8), (0, 1.5), (0,)]:
+            with pytest.raises(ValueError):
+                knights.prepare(grid, sources=[source])
+
+    def test_numpy_engine_matches_python(self):
+        pytest.importorskip('numpy')
+        grid = [[(r * 7 + c * 3) % 5 == 0 for c in range(30)] for r in range(30)]
+        grid = [[int(cell) for cell in row] for row in grid]
+        grid[0][0] = grid[29][29] = 0
+        expected = KnightsPortals(engine='python')._find_path_no_teleport(grid, (0, 0), (29, 29))
+        result = KnightsPortals(engine='numpy')._find_path_no_teleport(grid, (0, 0), (29, 29))
+        assert result['distance'] == expected['distance']
+        assert result['path'][0] == (0, 0) and result['path'][-1] == (29, 29)
+        assert KnightsPortals(engine='numpy').shortest_path(grid)['distance'] == 1
+
+    def test_bidirectional_engine(self):
+        grid = [[0] * 60 for _ in range(60)]
+        forward = KnightsPortals(engine='python')
+        bidirectional = KnightsPortals(engine='bidirectional')
+        expected = forward._find_path_no_teleport(grid, (20, 20), (40, 41))
+        result = bidirectional._find_path_no_teleport(grid, (20, 20), (40, 41))
+        assert result['distance'] == expected['distance']
+        assert result['path'][0] == (20, 20) and result['path'][-1] == (40, 41)
+        assert bidirectional.nodes_expanded < forward.nodes_expanded
+
+    def test_teleport_bound_prunes_search(self):
+        knights = KnightsPortals(engine='bidirectional')
+        grid = [[0] * 100 for _ in range(100)]
+        result = knights.shortest_path(grid)
+        assert result['distance'] == 1
+        assert result['used_teleport'] == True
+        assert result['nodes_expanded'] < 10
+
 class TestBitwiseMatching:
     def test_next_larger_same_bits(self):
         bitwise = BitwiseMatching()
@@ -96,6 +343,34 @@ class TestBitwiseMatching:
         result = bitwise.next_larger_same_bits(6)  # 110 in binary
         assert result['result'] == 9  # 1001 in binary
 
+    def test_next_larger_same_bits_many(self):
+        bitwise = BitwiseMatching()
+        values = [12, 6, 0, -3, 2**31 - 1, 2**30]
+        expected = [bitwise.next_larger_same_bits(n)['result'] for n in values]
+        assert bitwise.next_larger_same_bits_many(values)['results'] == expected
+        assert bitwise.next_larger_same_bits_many([2**40], bit_width=None)['results'] == [2**41]
+
+    def test_next_larger_same_bits_many_numpy(self):
+        np = pytest.importorskip('numpy')
+        bitwise = BitwiseMatching()
+        values = np.array([12, 6, 0, 2**31 - 1, 2**62 + 1], dtype=np.uint64)
+        result = bitwise.next_larger_same_bits_many(values, bit_width=63)
+        assert result['results'].tolist() == [17, 9, -1, 2**31 + 2**30 - 1, 2**62 + 2]
+
+    def test_combinations_bitmasks(self):
+        import itertools
+        bitwise = BitwiseMatching()
+        expected = sorted(sum(1 << i for i in c) for c in itertools.combinations(range(6), 3))
+        assert list(bitwise.combinations_bitmasks(6, 3)) == expected
+        assert list(bitwise.iter_same_popcount(2**40, 2**43)) == [2**40, 2**41, 2**42]
+
+    def test_combinations_bitmasks_array(self):
+        pytest.importorskip('numpy')
+        bitwise = BitwiseMatching()
+        chunks = [chunk.tolist() for chunk in bitwise.combinations_bitmasks_array(10, 4, chunk_size=64)]
+        assert [len(chunk) for chunk in chunks] == [64, 64, 64, 18]
+        assert sum(chunks, []) == list(bitwise.combinations_bitmasks(10, 4))
+
 class TestMatrixIslands:
     def test_count_islands(self):
         islands = MatrixIslands()
@@ -118,6 +393,108 @@ class TestMatrixIslands:
         result = islands.count_islands_with_diagonals(matrix)
         assert result['count'] == 1  # All connected diagonally
 
+    def test_large_island_without_recursion(self):
+        islands = MatrixIslands()
+        matrix = [[1] * 150 for _ in range(150)]
+        result = islands.count_islands_with_diagonals(matrix)
+        assert result['count'] == 1
+        assert result['islands'][0]['size'] == 150 * 150
+
+    def test_island_ids_follow_row_major_order(self):
+        islands = MatrixIslands()
+        matrix = [
+            [0, 0, 1, 0, 1],
+            [1, 0, 0, 1, 0],
+            [0, 0, 0, 0, 0],
+            [1, 1, 0, 0, 1]
+        ]
+        result = islands.count_islands_with_diagonals(matrix)
+        assert result['count'] == 4
+        assert [island['cells'][0] for island in result['islands']] == [(0, 2), (1, 0), (3, 0), (3, 4)]
+        assert result['visualization'][0] == '00101'
+
+    def test_numpy_labeling_matches_python(self, monkeypatch):
+        pytest.importorskip('numpy')
+        matrix = [[1 if (r * 7 + c * 11) % 9 < 3 else 0 for c in range(40)] for r in range(30)]
+        expected = MatrixIslands().count_islands_with_diagonals(matrix)
+        monkeypatch.setattr(MatrixIslands, 'NUMPY_MIN_CELLS', 1)
+        result = MatrixIslands().count_islands_with_diagonals(matrix)
+        assert result['count'] == expected['count']
+        assert result['visualization'] == expected['visualization']
+        assert [island['cells'] for island in result['islands']] == [island['cells'] for island in expected['islands']]
+        untraced = MatrixIslands().count_islands_with_diagonals(matrix, trace=False)
+        assert untraced['visualization'] is None and untraced['islands'][0]['cells'] is None
+
+    def test_streaming_rows(self):
+        islands = MatrixIslands()
+        rows = iter(['11000', '[1, 1, 0, 0, 0]', '', '00001', [0, 0, 0, 1, 0]])
+        result = islands.count_islands_streaming(rows)
+        assert result['count'] == 2
+        assert result['rows'] == 4 and result['cols'] == 5
+        assert result['islands'][0]['size'] == 4
+        assert result['islands'][1]['bounding_box'] == {
+            'min_row': 2, 'min_col': 3, 'max_row': 3, 'max_col': 4
+        }
+
+    def test_streaming_keeps_one_row_of_labels(self, monkeypatch):
+        islands = MatrixIslands()
+        label_counts = []
+        finish = islands._finish_stream_row
+        def counting_finish(parent, *args):
+            label_counts.append(len(parent))
+            return finish(parent, *args)
+        monkeypatch.setattr(islands, '_finish_stream_row', counting_finish)
+        rows = ['1010101010' if r % 2 else '0000000000' for r in range(400)] + ['1111111111']
+        result = islands.count_islands_streaming(rows)
+        assert result['count'] == 5 * 199 + 1
+        assert result['islands'][-1]['bounding_box'] == {'min_row': 399, 'min_col': 0, 'max_row': 400, 'max_col': 9}
+        assert max(label_counts) <= 11
+
+    def test_parallel_tiles_match_single_process(self):
+        islands = MatrixIslands()
+        matrix = [[1 if (r * 5 + c * 3) % 7 < 2 else 0 for c in range(12)] for r in range(10)]
+        matrix[3][4] = matrix[4][5] = 1  # diagonal contact across a tile corner
+        expected = islands.count_islands_with_diagonals(matrix)
+        result = islands.count_islands_parallel(matrix, workers=2, tile_rows=4)
+        assert result == expected
+        untraced = islands.count_islands_parallel(matrix, workers=2, tile_rows=1, trace=False)
+        assert untraced == islands.count_islands_with_diagonals(matrix, trace=False)
+
+class TestIslandTracker:
+    def test_set_land_merges_islands(self):
+        tracker = IslandTracker([
+            [1, 0, 1],
+            [0, 0, 0],
+            [1, 0, 1]
+        ])
+        assert tracker.count == 4
+        assert tracker.set_land(1, 1) == 1
+        assert tracker.island_size(0, 0) == 5
+
+    def test_set_water_splits_island(self):
+        tracker = IslandTracker([
+            [1, 0, 1],
+            [0, 1, 0],
+            [1, 0, 1]
+        ])
+        assert tracker.count == 1
+        assert tracker.set_water(1, 1) == 4
+        assert tracker.island_size(2, 2) == 1
+        assert tracker.set_water(0, 0) == 3
+        assert tracker.to_matrix() == [[0, 0, 1], [0, 0, 0], [1, 0, 1]]
+
+    def test_toggling_reuses_labels(self):
+        tracker = IslandTracker([
+            [1, 0, 1],
+            [0, 0, 0],
+            [1, 0, 1]
+        ])
+        for _ in range(200):
+            assert tracker.set_land(1, 1) == 1
+            assert tracker.set_water(1, 1) == 4
+        assert len(tracker.parent) <= 10
+        assert [tracker.island_size(r, c) for r in (0, 2) for c in (0, 2)] == [1, 1, 1, 1]
+
 class TestMiniInterpreter:
     def test_let_declaration(self):
         interpreter = MiniInterpreter()
@@ -137,5 +514,298 @@ class TestMiniInterpreter:
         result = interpreter.evaluate(code)
         assert result['result'] == 200
 
+    def test_precedence_and_unary_minus(self):
+        interpreter = MiniInterpreter()
+        assert interpreter.evaluate("2 + 3 * 4")['result'] == 14
+        assert interpreter.evaluate("10 - 4 - 3")['result'] == 3
+        assert interpreter.evaluate("let a = -3; (a + 1) * -2")['result'] == 4
+        result = interpreter.evaluate("let x = 2\nlet y = if ((x + 1) * 2 > 5) then x else -x\ny")
+        assert result['result'] == 2
+        assert result['steps'][1] == 'let y = if ((x + 1) * 2 > 5) then x else -x → 2'
+
+    def test_newlines_only_end_complete_statements(self):
+        interpreter = MiniInterpreter()
+        assert interpreter.evaluate("let c = 1\nif c\nthen 2\nelse 3")['result'] == 2
+        assert interpreter.evaluate("let a = 1 +\n2\n(a\n* 3)")['result'] == 9
+        result = interpreter.evaluate("let a = 4\n-a")
+        assert result['result'] == -4
+        assert result['variables'] == {'a': 4}
+
+    def test_compiled_programs_are_cached(self):
+        code = "let x = 1; x + 1"
+        assert MiniInterpreter.compile(code) is MiniInterpreter.compile(code)
+        result = MiniInterpreter().evaluate("let x = 1; x +")
+        assert result['result'] == 'Error: Unexpected end of statement'
+        assert result['variables'] == {'x': 1}
+
+    def test_evaluate_many_bytecode(self):
+        interpreter = MiniInterpreter()
+        code = "let d = x * x + y * y; if (d <= 25) then d - x else z"
+        bindings = [{'x': 3, 'y': 4}, {'x': 1, 'y': 1}, {'x': 9, 'y': 9, 'z': 0}, {'x': 9, 'y': 9}]
+        result = interpreter.evaluate_many(code, bindings)
+        assert result['results'] == [22, 1, 0, 'Error: Undefined variable: z']
+        assert 'steps' not in result
+        assert interpreter.evaluate_many("let y = x * 2; y * 3 - x", [{'x': 3}])['results'] == [15]
+        traced = interpreter.evaluate_many(code, bindings, trace=True)
+        assert traced['results'] == result['results']
+        assert traced['steps'][0] == ['let d = x * x + y * y → 25', 'if (d <= 25) → True, result: 22']
+
+    def test_evaluate_columns(self):
+        np = pytest.importorskip('numpy')
+        interpreter = MiniInterpreter()
+        columns = {'x': np.array([1, 2, 3, 4]), 'y': np.array([0, 2, 0, 3])}
+        result = interpreter.evaluate_columns("if (y != 0) then x // y else -x", columns)
+        assert result['vectorized'] == True
+        assert result['results'].tolist() == [-1, 1, -3, 1]
+
+    def test_evaluate_columns_keeps_booleans(self):
+        np = pytest.importorskip('numpy')
+        interpreter = MiniInterpreter()
+        x = np.array([0, 1, 2, 3])
+        rows = [{'x': int(value)} for value in x]
+        for code, vectorized in (("x > 1", True), ("if (x > 1) then x > 2 else x", False)):
+            result = interpreter.evaluate_columns(code, {'x': x})
+            expected = interpreter.evaluate_many(code, rows)['results']
+            results = result['results'].tolist() if vectorized else result['results']
+            assert result['vectorized'] == vectorized
+            assert results == expected
+            assert [type(value) for value in results] == [type(value) for value in expected]
+        one_branch = interpreter.evaluate_columns("if (x > 100) then x else x > 0", {'x': np.array([1, 2])})
+        assert one_branch['results'].tolist() == [True, True]
+        assert interpreter.evaluate_many("if (x > 100) then x else x > 0", [{'x': 1}, {'x': 2}])['results'] == [True, True]
+
+    def test_evaluate_columns_falls_back(self):
+        np = pytest.importorskip('numpy')
+        interpreter = MiniInterpreter()
+        result = interpreter.evaluate_columns("x // y", {'x': np.array([4, 5]), 'y': np.array([2, 0])})
+        assert result['vectorized'] == False
+        assert result['results'] == [2, 'Error: integer division or modulo by zero']
+        big = interpreter.evaluate_columns("x * x", {'x': [2**40]})
+        assert big['vectorized'] == False
+        assert big['results'] == [2**80]
+
+    def test_budgets(self):
+        interpreter = MiniInterpreter(max_steps=50, max_int_bits=256)
+        growth = interpreter.evaluate("let x = 99999; " + "; ".join(["let x = x * x"] * 10))
+        assert growth['budget_exceeded'] == {'limit': 'int_bits', 'max': 256}
+        assert growth['variables']['x'] == 99999 ** 8
+        large = interpreter.evaluate(" + ".join(["1"] * 60))
+        assert large['budget_exceeded'] == {'limit': 'steps', 'max': 50}
+        assert large['steps'] == []
+        with pytest.raises(BudgetExceeded):
+            MiniInterpreter(time_limit=0).evaluate_many("x + 1", ({'x': i} for i in range(10)))
+        assert interpreter.evaluate_many("x * x", [{'x': 2**100}, {'x': 2**200}])['results'] == [
+            2**200, 'Error: Integer too large: more than 256 bits']
+
+    def test_non_string_code_is_refused(self):
+        interpreter = MiniInterpreter()
+        result = interpreter.evaluate(5)
+        assert result['result'] == 'Error: Code must be a string, not int'
+        assert result['budget_exceeded'] is None and result['variables'] == {}
+        with pytest.raises(TypeError):
+            interpreter.evaluate_many(['x'], [{'x': 1}])
+
+    def test_depth_budget_counts_nesting_not_chains(self):
+        np = pytest.importorskip('numpy')
+        interpreter = MiniInterpreter()
+        chain = " + ".join(["x"] * 5000)
+        assert interpreter.evaluate("let x = 1; " + chain)['result'] == 5000
+        assert interpreter.evaluate_many(chain, [{'x': 2}])['results'] == [10000]
+        assert interpreter.evaluate_columns(chain, {'x': np.array([1, 3])})['results'].tolist() == [5000, 15000]
+        nested = "(" * 300 + "1" + ")" * 300
+        result = interpreter.evaluate(nested)
+        assert result['budget_exceeded'] == {'limit': 'depth', 'max': 500}
+        with pytest.raises(BudgetExceeded):
+            interpreter.evaluate_many(nested, [{}])
+        assert MiniInterpreter(max_depth=700).evaluate(nested)['result'] == 1
+        assert MiniInterpreter(max_depth=20).evaluate("-" * 30 + "1")['budget_exceeded']['limit'] == 'depth'
+
+    def test_only_numbers_are_bound_and_sums_are_budgeted(self):
+        interpreter = MiniInterpreter(max_int_bits=256)
+        for value in ['ab', [1], None]:
+            with pytest.raises(ValueError):
+                interpreter.evaluate_many("x * 10000000", [{'x': value}])
+            with pytest.raises(ValueError):
+                interpreter.evaluate_many("x + x", [{'x': value}], trace=True)
+        assert interpreter.evaluate_many("x + x", [{'x': 2**255}, {'x': True}, {'x': 1.5}])['results'] == [
+            'Error: Integer too large: more than 256 bits', 2, 3.0]
+        doubled = interpreter.evaluate("let x = " + str(2**255) + "; x + x")
+        assert doubled['budget_exceeded'] == {'limit': 'int_bits', 'max': 256}
+
+    def test_time_limit_inside_statement(self, monkeypatch):
+        import algorithms.mini_interpreter as mini
+        ticks = iter(range(10**6))
+        monkeypatch.setattr(mini.time, 'monotonic', lambda: next(ticks))
+        statement = '1'
+        while len(statement) < 10000:
+            statement = f'({statement} + {statement})'
+        interpreter = MiniInterpreter(time_limit=1)
+        with pytest.raises(BudgetExceeded):
+            interpreter.evaluate_many(statement, [{}])
+        result = interpreter.evaluate(statement)
+        assert result['budget_exceeded'] == {'limit': 'time', 'max': 1}
+
+class TestGridEncoding:
+    def test_bitpacked_round_trip(self):
+        grid = PackedGrid.from_rle([[0, 3, 7], [10], [9, 1]])
+        assert grid[0] == bytes([1, 1, 1, 0, 0, 0, 0, 0, 0, 0])
+        decoded = PackedGrid.from_bitpacked(3, 10, grid.to_bitpacked())
+        assert decoded.cells == grid.cells
+        assert decoded.to_rle() == [[0, 3, 7], [10], [9, 1]]
+
+    def test_solvers_accept_packed_grids(self):
+        matrix = [
+            [1, 1, 0, 0, 0],
+            [0, 0, 0, 1, 0],
+            [0, 0, 0, 0, 0],
+            [0, 1, 0, 0, 1]
+        ]
+        packed = PackedGrid.from_rle([[0, 2, 3], [3, 1, 1], [5], [1, 1, 2, 1]])
+        islands = MatrixIslands()
+        assert (islands.count_islands_with_diagonals(packed) ==
+                islands.count_islands_with_diagonals(matrix))
+        knights = KnightsPortals()
+        assert knights.shortest_path(packed) == knights.shortest_path(matrix)
+
+    def test_compress_visualization(self):
+        assert compress_visualization(['..##1']) == [[[2, '.'], [2, '#'], [1, '1']]]
+
+class TestTracing:
+    def test_lazy_trace_builds_once_on_first_read(self):
+        calls = []
+        def build(value):
+            calls.append(value)
+            return [value, value]
+        trace = lazy_trace(LAZY, build, 'a')
+        assert calls == []
+        assert trace == ['a', 'a']
+        assert list(trace) == ['a', 'a'] and trace[1] == 'a' and 'a' in trace
+        assert calls == ['a']
+        assert lazy_trace(False, build, 'b') is None
+        assert calls == ['a']
+
+    def test_solvers_skip_trace_when_off(self):
+        assert AlienDictionary().find_order(["wrt", "wrf", "er"], trace=False)['explanation'] is None
+        assert BitwiseMatching().next_larger_same_bits(12, trace=False)['explanation'] is None
+        assert KnightsPortals().shortest_path([[0, 0], [0, 0]], trace=False)['visualization'] is None
+        assert MatrixIslands().count_islands_with_diagonals([[1, 0], [0, 1]], trace=False)['visualization'] is None
+        result = MiniInterpreter().evaluate("let x = 2; let y = x * 3; y - 1", trace=False)
+        assert result == {'result': 5, 'variables': {'x': 2, 'y': 6}, 'steps': None}
+        assert SudokuValidator().validate_with_custom_zones([[0] * 9 for _ in range(9)], [], trace=False) == {
+            'valid': True, 'errors': [], 'details': None
+        }
+        streamed = MatrixIslands().count_islands_streaming(['110', '001'], trace=False)
+        assert streamed['islands'] == [{'id': 1, 'size': 3, 'bounding_box': None}]
+
+    def test_traces_are_built_by_default(self):
+        import json
+        result = MiniInterpreter().evaluate('1 + 1')
+        assert json.loads(json.dumps(result))['steps'] == ['1 + 1 → 2']
+        explanation = AlienDictionary().find_order(["wrt", "wrf"])['explanation']
+        assert explanation.startswith('Analysis steps:')
+        assert isinstance(KnightsPortals().shortest_path([[0, 0], [0, 0]])['visualization'], list)
+
+    def test_lazy_traced_results(self):
+        result = AlienDictionary().find_order(["wrt", "wrf"], trace=LAZY)
+        assert isinstance(result['explanation'], LazyTrace)
+        assert result['explanation'] == "Analysis steps: 'wrt' vs 'wrf': t comes before f"
+        result = MiniInterpreter().evaluate("let x = 2; if (x > 1) then x * 3 else 0", trace=LAZY)
+        assert isinstance(result['steps'], LazyTrace)
+        assert result['steps'] == ['let x = 2 → 2', 'if (x > 1) → True, result: 6']
+
+class TestApi:
+    @pytest.fixture
+    def client(self):
+        return app.test_client()
+    
+    def test_batch_endpoints(self, client):
+        solved = [[(r * 3 + r // 3 + c) % 9 + 1 for c in range(9)] for r in range(9)]
+        response = client.post('/api/sudoku/validate-batch', json={'boards': [solved, [[0] * 9] * 9]})
+        assert response.json == {'success': True, 'results': [True, True], 'valid_count': 2}
+        response = client.post('/api/knights-portals/batch', json={
+            'grid': [[0] * 3 for _ in range(3)],
+            'queries': [{'start': [0, 0], 'end': [2, 1]}]
+        })
+        assert response.json['results'] == [{
+            'start': [0, 0], 'end': [2, 1], 'shortest_path': [[0, 0], [2, 1]],
+            'distance': 1, 'used_teleport': False
+        }]
+        response = client.post('/api/bitwise-matching/batch', json={'numbers': [5, 12]})
+        assert response.json == {'success': True, 'results': [6, 17]}
+        response = client.post('/api/mini-interpreter/batch', json={'code': 'x * 2', 'bindings': [{'x': 2}]})
+        assert response.json == {'success': True, 'results': [4]}
+        
+        for url, body in [
+            ('/api/sudoku/validate-batch', {'boards': [solved], 'zone_layout': 'missing'}),
+            ('/api/knights-portals/batch', {'grid': [[0]], 'queries': [{'start': [0, 0]}]}),
+            ('/api/bitwise-matching/batch', {'numbers': 'five'}),
+            ('/api/mini-interpreter/batch', {'code': 'x', 'bindings': [{'x': 'a'}]}),
+            ('/api/mini-interpreter', {'code': 5})
+        ]:
+            response = client.post(url, json=body)
+            assert response.status_code == 400 and response.json['success'] == False
+    
+    def test_solve_and_zone_layouts(self, client):
+        empty = [[0] * 9 for _ in range(9)]
+        response = client.post('/api/sudoku/zone-layouts', json={'custom_zones': [[[i, i] for i in range(9)]]})
+        layout_id = response.json['zone_layout']
+        assert response.json['valid'] == True
+        response = client.post('/api/sudoku/solve', json={'board': empty, 'zone_layout': layout_id, 'trace': False})
+        assert response.json['solution_count'] == 2 and response.json['details'] is None
+        response = client.post('/api/sudoku/solve', json={'board': empty, 'limit': 1})
+        assert response.json['unique'] is None and response.json['details']['custom_zones'] is not None
+        assert client.post('/api/sudoku/solve', json={'board': empty, 'limit': 10**9}).json['solution_count'] == 100
+        
+        for body in [{'board': empty, 'limit': '3'}, {'board': empty, 'limit': 0}, {'board': empty, 'zone_layout': 'missing'}]:
+            assert client.post('/api/sudoku/solve', json=body).status_code == 400
+        assert client.post('/api/sudoku/zone-layouts', json={'custom_zones': 5}).status_code == 400
+        response = client.post('/api/sudoku/zone-layouts', json={'custom_zones': [[[0, 'a']]]})
+        assert response.json['errors'] == ['Custom zone 1 must be a list of (row, col) cells']
+    
+    def test_sessions(self, client):
+        response = client.post('/api/sudoku/sessions', json={'board': [[0] * 9 for _ in range(9)], 'trace': False})
+        sudoku = response.json['session_id']
+        assert response.json['details'] is None
+        response = client.post(f'/api/sudoku/sessions/{sudoku}/cells', json={'row': 0, 'col': 0, 'value': 5})
+        assert response.json == {'success': True, 'valid': True, 'changes': [], 'errors': None}
+        assert client.post(f'/api/sudoku/sessions/{sudoku}/cells', json={'col': 0}).status_code == 400
+        
+        response = client.post('/api/alien-dictionary/sessions', json={'words': ['wrt', 'wrf'], 'trace': False})
+        alien = response.json['session_id']
+        response = client.post(f'/api/alien-dictionary/sessions/{alien}/words', json={'words': ['er']})
+        assert response.json['order'] == 'wrtfe' and response.json['explanation'] is None
+        
+        response = client.post('/api/matrix-islands/sessions', json={'matrix': [[1, 0], [0, 0]], 'trace': False})
+        islands = response.json['session_id']
+        assert response.json['visualization'] is None
+        response = client.post(f'/api/matrix-islands/sessions/{islands}/cells', json={'row': 1, 'col': 1})
+        assert response.json == {'success': True, 'island_count': 1, 'island_size': 2, 'visualization': None}
+        assert client.post('/api/matrix-islands/sessions', json={'matrix': [[1, 0], [1]]}).status_code == 400
+        
+        # A session of another kind is as unknown as a missing one
+        assert client.delete(f'/api/matrix-islands/sessions/{sudoku}').status_code == 404
+        for session_id, cells_url in [
+            (sudoku, f'/api/sudoku/sessions/{sudoku}/cells'),
+            (alien, f'/api/alien-dictionary/sessions/{alien}/words'),
+            (islands, f'/api/matrix-islands/sessions/{islands}/cells')
+        ]:
+            session_url = cells_url.rsplit('/', 1)[0]
+            assert client.post(cells_url.replace(session_id, 'missing'), json={'row': 0, 'col': 0}).status_code == 404
+            assert client.delete(session_url).json == {'success': True}
+            response = client.post(cells_url, json={'row': 0, 'col': 0, 'words': []})
+            assert response.status_code == 404 and response.json['error'] == f'Unknown session: {session_id}'
+            assert client.delete(session_url).status_code == 404
+    
+    def test_stream(self, client):
+        response = client.post('/api/matrix-islands/stream', data='110\n001\n')
+        assert response.json['island_count'] == 1
+        assert response.json['islands'][0]['bounding_box'] is not None
+        response = client.post('/api/matrix-islands/stream?trace=false', data='[1, 0]\n[0, 1]\n')
+        assert response.json == {
+            'success': True, 'island_count': 1, 'rows': 2, 'cols': 2,
+            'islands': [{'id': 1, 'size': 2, 'bounding_box': None}]
+        }
+        assert client.post('/api/matrix-islands/stream', data='110\n01\n').status_code == 400
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file